@@ -0,0 +1,484 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from generate_shelf_assignment import (
+    add_dropdown_validations, expand_shelf_layout, patch_output_cells, read_family_data, write_shelf_workbook
+)
+from shelf_planogram import export_planograms
+from shelf_search import SearchIndex, filter_rows
+from shelf_solver import assignment_metrics, solve_assignment
+from shelf_store import ChangeJournal, open_store
+from shelf_table import EditHistory, ShelfIndex, bulk_assign, from_compact, select_rows, set_cell, to_compact
+
+BUNDLED_FAMILY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "family information.xlsx")
+
+def synthetic_layout(total_shelves, levels=6, shelves=20, sides=2):
+    """Build a shelf summary table that expands to roughly total_shelves shelves."""
+    per_aisle = sides * levels * shelves
+    num_aisles = max(1, total_shelves // per_aisle)
+    # Spread the aisles over a handful of sections, like a real store layout
+    num_sections = min(10, num_aisles)
+    aisles_per_section = [num_aisles // num_sections] * num_sections
+    aisles_per_section[0] += num_aisles - sum(aisles_per_section)
+    return pd.DataFrame({
+        'section': [f"S{i + 1}" for i in range(num_sections)],
+        'aisles': aisles_per_section,
+        'sides': sides,
+        'levels max': levels,
+        'shelves max': shelves
+    })
+
+def synthetic_families(num_families=20, categories_per_family=25):
+    """Build a families -> categories mapping shaped like the bundled catalog."""
+    return {
+        f"Family {f + 1}": [f"Family {f + 1} category {c + 1}" for c in range(categories_per_family)]
+        for f in range(num_families)
+    }
+
+def _shelf_workbook(shelf_df):
+    """Return an openpyxl workbook holding shelf_df plus empty Family/Category columns."""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(shelf_df.columns) + ['Family', 'Category'])
+    for row in shelf_df.itertuples(index=False):
+        ws.append([str(row[0])] + [int(v) for v in row[1:]])
+    return wb, ws
+
+def _add_per_row_validations(ws, families_dict, last_row):
+    """The original approach: two inline-list validations for every data row."""
+    family_list = ",".join(families_dict.keys())
+    all_categories = set()
+    for cats in families_dict.values():
+        all_categories.update(cats)
+    category_list = ",".join(all_categories)
+    for row in range(2, last_row + 1):
+        dv_family = DataValidation(type="list", formula1=f'"{family_list}"', allow_blank=True)
+        dv_family.add(f"F{row}")
+        ws.add_data_validation(dv_family)
+        dv_category = DataValidation(type="list", formula1=f'"{category_list}"', allow_blank=True)
+        dv_category.add(f"G{row}")
+        ws.add_data_validation(dv_category)
+
+def bench_validations(rows=100_000):
+    """Compare file size and save time of per-row versus range-based dropdowns."""
+    print(f"dropdown validations, {rows} rows")
+    shelf_df = expand_shelf_layout(synthetic_layout(rows))
+    families_dict = synthetic_families()
+    approaches = (
+        ('per-row', lambda wb, ws: _add_per_row_validations(ws, families_dict, ws.max_row)),
+        ('range', lambda wb, ws: add_dropdown_validations(wb, ws, families_dict, ws.max_row)),
+    )
+    print(f"{'approach':>10} {'add s':>8} {'save s':>8} {'MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, add in approaches:
+            wb, ws = _shelf_workbook(shelf_df)
+            path = os.path.join(tmp, f"{name}.xlsx")
+            start = time.perf_counter()
+            add(wb, ws)
+            added = time.perf_counter()
+            wb.save(path)
+            saved = time.perf_counter()
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{name:>10} {added - start:>8.2f} {saved - added:>8.2f} {size_mb:>8.2f}")
+
+def _write_reload_save(df, families_dict, path):
+    """The original approach: to_excel, reload the whole file, add dropdowns, save again."""
+    df.to_excel(path, index=False)
+    wb = load_workbook(path)
+    ws = wb.active
+    add_dropdown_validations(wb, ws, families_dict, ws.max_row)
+    wb.save(path)
+
+def bench_writer(sizes=(10_000, 25_000, 50_000)):
+    """Compare time and peak traced memory of the two-pass and streaming output writers."""
+    print("output writer")
+    families_dict = synthetic_families()
+    writers = (
+        ('two-pass', _write_reload_save),
+        ('streaming', write_shelf_workbook),
+    )
+    print(f"{'rows':>8} {'writer':>10} {'s':>7} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            df = expand_shelf_layout(synthetic_layout(size))
+            df['Family'] = ""
+            df['Category'] = ""
+            for name, write in writers:
+                path = os.path.join(tmp, f"{name}.xlsx")
+                tracemalloc.start()
+                start = time.perf_counter()
+                write(df, families_dict, path)
+                elapsed = time.perf_counter() - start
+                peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+                print(f"{len(df):>8} {name:>10} {elapsed:>7.2f} {peak_mb:>8.1f}")
+
+def write_synthetic_family_workbook(path, num_sheets=500, categories=30, product_rows=40):
+    """Write a family catalog with num_sheets sheets laid out like the bundled file."""
+    wb = Workbook(write_only=True)
+    for sheet in range(num_sheets):
+        ws = wb.create_sheet(f"Sheet{sheet + 1}")
+        ws.append([f"{sheet + 1:02d}"] + [f"{c + 1:02d}" for c in range(categories)])
+        ws.append([f"Family {sheet + 1}"] + [f"Category {sheet + 1}.{c + 1}" for c in range(categories)])
+        for product in range(product_rows):
+            ws.append([f"{product + 1:02d}"] + [f"Product {sheet + 1}.{c + 1}.{product + 1}" for c in range(categories)])
+    wb.save(path)
+
+def _read_family_data_pandas(family_file, max_sheets=None):
+    """The original reader: every sheet loaded in full through pandas."""
+    xls = pd.ExcelFile(family_file)
+    families_dict = {}
+    for sheet_name in xls.sheet_names[:max_sheets]:
+        df = pd.read_excel(family_file, sheet_name=sheet_name)
+        family = str(df.iloc[0, 0]) if not pd.isna(df.iloc[0, 0]) else ""
+        if family:
+            families_dict[family] = [str(cat) for cat in df.iloc[0, 1:].dropna().tolist()]
+    return families_dict
+
+def bench_family_reader(synthetic_sheets=500, pandas_sample_sheets=25):
+    """Time the pandas reader against the header-only reader, serial and parallel.
+
+    The pandas reader re-opens the workbook for every sheet, so on the synthetic
+    workbook it only reads pandas_sample_sheets sheets and the total is extrapolated.
+    """
+    print(f"family reader ({os.cpu_count()} CPUs)")
+    print(f"{'workbook':>12} {'reader':>9} {'s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_file = os.path.join(tmp, "families.xlsx")
+        write_synthetic_family_workbook(synthetic_file, num_sheets=synthetic_sheets)
+        workbooks = (
+            ('bundled', BUNDLED_FAMILY_FILE, None),
+            (f"{synthetic_sheets} sheets", synthetic_file, pandas_sample_sheets),
+        )
+        for label, path, sample in workbooks:
+            start = time.perf_counter()
+            expected = _read_family_data_pandas(path, max_sheets=sample)
+            elapsed = time.perf_counter() - start
+            if sample:
+                print(f"{label:>12} {'pandas':>9} {elapsed * synthetic_sheets / sample:>8.2f}  (estimated from {sample} sheets)")
+            else:
+                print(f"{label:>12} {'pandas':>9} {elapsed:>8.2f}")
+            
+            for name, workers in (('header', 1), ('parallel', None)):
+                start = time.perf_counter()
+                _, families_dict = read_family_data(path, workers=workers)
+                elapsed = time.perf_counter() - start
+                if any(families_dict.get(family) != cats for family, cats in expected.items()):
+                    print(f"  {name} reader returned different families for {label}")
+                print(f"{label:>12} {name:>9} {elapsed:>8.2f}")
+
+def bench_save(rows=100_000, edit_counts=(10, 100, 1000)):
+    """Compare a full to_excel rewrite with patching only the edited rows in place."""
+    print(f"save edits, {rows} rows")
+    families_dict = synthetic_families()
+    df = expand_shelf_layout(synthetic_layout(rows))
+    df['Family'] = ""
+    df['Category'] = ""
+    print(f"{'edits':>6} {'rewrite s':>10} {'patch s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "output.xlsx")
+        write_shelf_workbook(df, families_dict, path)
+        rng = random.Random(0)
+        for edits in edit_counts:
+            updates = {row: ("Family 1", "Family 1 category 1") for row in rng.sample(range(len(df)), edits)}
+            start = time.perf_counter()
+            df.to_excel(os.path.join(tmp, "rewrite.xlsx"), index=False)
+            rewrite = time.perf_counter() - start
+            start = time.perf_counter()
+            patch_output_cells(path, updates)
+            patch = time.perf_counter() - start
+            print(f"{edits:>6} {rewrite:>10.2f} {patch:>8.2f}")
+
+def synthetic_assignment_table(rows, families_dict, assigned_fraction=0.6, seed=0):
+    """Expanded shelves with a random share of them assigned to catalog categories."""
+    rng = np.random.default_rng(seed)
+    df = expand_shelf_layout(synthetic_layout(rows))
+    pairs = [(family, cat) for family, cats in families_dict.items() for cat in cats]
+    choice = rng.integers(0, len(pairs), len(df))
+    assigned = rng.random(len(df)) < assigned_fraction
+    df['Family'] = np.where(assigned, np.array([p[0] for p in pairs], dtype=object)[choice], None)
+    df['Category'] = np.where(assigned, np.array([p[1] for p in pairs], dtype=object)[choice], None)
+    return df
+
+def bench_store(rows=500_000, formats=('.xlsx', '.npz', '.parquet')):
+    """Cold load and full save of the assignment table for each storage backend."""
+    print(f"assignment store, {rows} rows")
+    families_dict = synthetic_families()
+    df = synthetic_assignment_table(rows, families_dict)
+    print(f"{'format':>9} {'save s':>9} {'load s':>9} {'MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension in formats:
+            store = open_store(os.path.join(tmp, f"store{extension}"), families_dict=families_dict)
+            try:
+                start = time.perf_counter()
+                store.save(df)
+                saved = time.perf_counter()
+                loaded = store.load()
+                elapsed_load = time.perf_counter() - saved
+            except ImportError as e:
+                print(f"{extension:>9} skipped: {str(e).splitlines()[0]}")
+                continue
+            if len(loaded) != len(df):
+                print(f"  {extension} store returned {len(loaded)} rows")
+            size_mb = os.path.getsize(store.path) / 1e6
+            print(f"{extension:>9} {saved - start:>9.3f} {elapsed_load:>9.3f} {size_mb:>7.1f}")
+
+def bench_solver(sizes=(10_000, 100_000, 1_000_000), fill=0.9, locked_fraction=0.05):
+    """Solve random category targets over synthetic stores and report time and quality."""
+    print("assignment solver")
+    families_dict = synthetic_families()
+    pairs = [(family, cat) for family, cats in families_dict.items() for cat in cats]
+    print(f"{'shelves':>9} {'s':>7} {'fragment':>9} {'bays/fam':>9} {'deviation':>10}")
+    for size in sizes:
+        rng = np.random.default_rng(size)
+        df = expand_shelf_layout(synthetic_layout(size))
+        df['Family'] = None
+        df['Category'] = None
+        # Pre-lock a few scattered shelves, as if assigned by hand
+        locked = rng.random(len(df)) < locked_fraction
+        choice = rng.integers(0, len(pairs), int(locked.sum()))
+        df.loc[locked, 'Family'] = [pairs[i][0] for i in choice]
+        df.loc[locked, 'Category'] = [pairs[i][1] for i in choice]
+        
+        weights = rng.random(len(pairs))
+        counts = np.floor(weights / weights.sum() * len(df) * fill).astype(int)
+        targets = dict(zip(pairs, counts.tolist()))
+        start = time.perf_counter()
+        assigned = solve_assignment(df, families_dict, targets)
+        elapsed = time.perf_counter() - start
+        # Quality of the solver's own placement; the scattered locked shelves would dominate otherwise
+        metrics = assignment_metrics(assigned[~locked])
+        metrics['target_deviation'] = assignment_metrics(assigned, targets)['target_deviation']
+        print(f"{len(df):>9} {elapsed:>7.3f} {metrics['fragmentation']:>9.2f} "
+              f"{metrics['bays_per_family']:>9.2f} {metrics['target_deviation']:>10.4f}")
+
+def bench_memory(rows=1_000_000):
+    """Memory of the assignment table as read from Excel versus its compact form."""
+    print(f"assignment table memory, {rows} rows")
+    families_dict = synthetic_families()
+    plain = from_compact(synthetic_assignment_table(rows, families_dict))
+    start = time.perf_counter()
+    compact = to_compact(plain, families_dict)
+    elapsed = time.perf_counter() - start
+    print(f"{'column':>10} {'plain MB':>9} {'compact MB':>11}  dtype")
+    plain_usage = plain.memory_usage(deep=True, index=False)
+    compact_usage = compact.memory_usage(deep=True, index=False)
+    for name in plain.columns:
+        print(f"{name:>10} {plain_usage[name] / 1e6:>9.1f} {compact_usage[name] / 1e6:>11.1f}  {compact[name].dtype.name}")
+    print(f"{'total':>10} {plain_usage.sum() / 1e6:>9.1f} {compact_usage.sum() / 1e6:>11.1f}")
+    print(f"to_compact took {elapsed:.2f}s")
+
+def bench_bay_lookup(sizes=(10_000, 100_000, 1_000_000)):
+    """Look up every cell of one bay with per-cell boolean masks versus the ShelfIndex."""
+    print("bay cell lookup")
+    families_dict = synthetic_families()
+    print(f"{'rows':>9} {'masks s':>9} {'index build s':>14} {'index s':>9}")
+    for size in sizes:
+        df = to_compact(synthetic_assignment_table(size, families_dict), families_dict)
+        section, aisle, side = df['Section'].iloc[-1], 1, 1
+        cells = [(level, shelf) for level in range(1, int(df['Level'].max()) + 1)
+                 for shelf in range(1, int(df['Shelf'].max()) + 1)]
+        
+        start = time.perf_counter()
+        for level, shelf in cells:
+            mask = ((df['Section'] == section) & (df['Aisle'] == aisle) & (df['Side'] == side) &
+                    (df['Level'] == level) & (df['Shelf'] == shelf))
+            df[mask]
+        masks = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        index = ShelfIndex(df)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        bay_cells = index.bay_cells(section, aisle, side)
+        category_col = df.columns.get_loc('Category')
+        for cell in cells:
+            df.iat[bay_cells[cell], category_col]
+        lookup = time.perf_counter() - start
+        print(f"{len(df):>9} {masks:>9.3f} {built:>14.3f} {lookup:>9.4f}")
+
+def bench_bulk_assign(rows=1_000_000, per_row_limit=20_000):
+    """Assign one category to an aisle and to a section, row by row versus bulk_assign."""
+    print("bulk assign")
+    families_dict = synthetic_families()
+    family = next(iter(families_dict))
+    category = families_dict[family][0]
+    df = to_compact(synthetic_assignment_table(rows, families_dict), families_dict)
+    section = df['Section'].iloc[0]
+    print(f"{'target':>8} {'shelves':>9} {'select s':>9} {'per-row s':>10} {'bulk s':>9}")
+    for target, selectors in (('aisle', {'section': section, 'aisle': 1}), ('section', {'section': section})):
+        start = time.perf_counter()
+        positions = select_rows(df, **selectors)
+        selected = time.perf_counter() - start
+        
+        # The per-row path is timed on a sample and extrapolated, it is far too slow otherwise
+        sample = positions[:per_row_limit]
+        start = time.perf_counter()
+        for row in sample.tolist():
+            set_cell(df, row, 'Family', family)
+            set_cell(df, row, 'Category', category)
+        per_row = (time.perf_counter() - start) * len(positions) / max(len(sample), 1)
+        
+        start = time.perf_counter()
+        bulk_assign(df, positions, family, category)
+        bulk = time.perf_counter() - start
+        print(f"{target:>8} {len(positions):>9} {selected:>9.3f} {per_row:>10.2f} {bulk:>9.4f}")
+
+def bench_journal(rows=1_000_000, edits=10_000):
+    """Cost of making an edit durable: one journal append versus saving the whole store."""
+    print("change journal")
+    families_dict = synthetic_families()
+    pairs = [(family, cat) for family, cats in families_dict.items() for cat in cats]
+    df = to_compact(synthetic_assignment_table(rows, families_dict), families_dict)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = open_store(os.path.join(tmp, "store.npz"))
+        start = time.perf_counter()
+        store.save(df)
+        full_save = time.perf_counter() - start
+        
+        journal = ChangeJournal(store.path)
+        start = time.perf_counter()
+        for row in rng.integers(0, len(df), edits).tolist():
+            family, category = pairs[row % len(pairs)]
+            journal.append([row], family, category)
+        append = (time.perf_counter() - start) / edits
+        journal.close()
+        
+        start = time.perf_counter()
+        ChangeJournal(store.path).replay(store.load())
+        replay = time.perf_counter() - start
+        print(f"{len(df)} rows: full npz save {full_save:.3f} s, journal append {append * 1e6:.1f} us/edit, "
+              f"replay of {edits} edits {replay:.2f} s")
+
+def bench_history(rows=1_000_000, edits=5_000, shelves_per_edit=120):
+    """Memory and time of the undo history over many bay-sized edits."""
+    print("undo history")
+    families_dict = synthetic_families()
+    pairs = [(family, cat) for family, cats in families_dict.items() for cat in cats]
+    df = to_compact(synthetic_assignment_table(rows, families_dict), families_dict)
+    history = EditHistory()
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for edit in range(edits):
+        first = int(rng.integers(0, len(df) - shelves_per_edit))
+        positions = np.arange(first, first + shelves_per_edit)
+        before = history.capture(df, positions)
+        bulk_assign(df, positions, *pairs[edit % len(pairs)])
+        history.record(df, before)
+    per_edit = (time.perf_counter() - start) / edits
+    held = sum(r.nbytes + sum(c.nbytes for c in old + new) for r, old, new in history.undo_stack)
+    snapshot = df.memory_usage(deep=True).sum()
+    
+    start = time.perf_counter()
+    while history.undo(df) is not None:
+        pass
+    undo_all = time.perf_counter() - start
+    print(f"{edits} edits of {shelves_per_edit} shelves on {len(df)} rows: {per_edit * 1e3:.2f} ms/edit, "
+          f"{len(history.redo_stack)} kept in {held / 1e6:.2f} MB (one table copy: {snapshot / 1e6:.1f} MB), "
+          f"undo all {undo_all:.2f} s")
+
+def bench_search(names=20_000, rows=1_000_000):
+    """Type-ahead over a large catalog and table filter queries on a large store."""
+    print("search")
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))) for _ in range(2000)]
+    values = [" ".join(rng.sample(words, 2)) for _ in range(names)]
+    start = time.perf_counter()
+    index = SearchIndex(values)
+    built = time.perf_counter() - start
+    
+    # Every prefix of a few names, as typed one key at a time
+    typed = [name[:length] for name in values[:50] for length in range(1, len(name) + 1)]
+    start = time.perf_counter()
+    for text in typed:
+        [value for value in values if value.lower().startswith(text)]
+    linear = (time.perf_counter() - start) / len(typed)
+    start = time.perf_counter()
+    for text in typed:
+        index.search(text)
+    indexed = (time.perf_counter() - start) / len(typed)
+    start = time.perf_counter()
+    fuzzy_hits = sum(bool(index.search(name[:3] + name[4:])) for name in values[:200])
+    fuzzy = (time.perf_counter() - start) / 200
+    print(f"{names} names: index build {built:.2f} s, per key linear startswith {linear * 1e3:.2f} ms, "
+          f"index {indexed * 1e3:.3f} ms, typo query {fuzzy * 1e3:.2f} ms ({fuzzy_hits}/200 found)")
+    
+    families_dict = synthetic_families()
+    df = to_compact(synthetic_assignment_table(rows, families_dict), families_dict)
+    category = families_dict[next(iter(families_dict))][0]
+    for query in (f'category:"{category}"', "unassigned aisle:3", "section:S1 level:1,2 assigned"):
+        start = time.perf_counter()
+        found = filter_rows(df, query)
+        print(f"  filter {query!r} on {len(df)} rows: {len(found)} shelves in {time.perf_counter() - start:.3f} s")
+
+def bench_planogram(rows=240_000, workers=(1, None)):
+    """Headless SVG + multi-page PDF export of every bay, in one worker process and on the whole pool."""
+    print(f"planogram export, {rows} rows")
+    families_dict = synthetic_families()
+    df = synthetic_assignment_table(rows, families_dict)
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "store.npz")
+        open_store(store_path).save(df)
+        for count in workers:
+            out_dir = os.path.join(tmp, f"out{count}")
+            start = time.perf_counter()
+            results = export_planograms(store_path, out_dir, ('svg', 'pdf'), families_dict, workers=count)
+            elapsed = time.perf_counter() - start
+            pdf_mb = os.path.getsize(os.path.join(out_dir, "planogram.pdf")) / 1e6
+            print(f"  {count or os.cpu_count()} workers: {len(results)} bays in {elapsed:.2f} s "
+                  f"({elapsed / len(results) * 1e3:.1f} ms/bay), PDF {pdf_mb:.1f} MB")
+
+def bench_expand_shelf_layout(sizes=(125_000, 250_000, 500_000, 1_000_000, 2_000_000), repeat=3):
+    """Time expand_shelf_layout at increasing store sizes and report the cost per shelf."""
+    print("expand_shelf_layout")
+    print(f"{'shelves':>10} {'best s':>9} {'ns/shelf':>9} {'MB':>7}")
+    for size in sizes:
+        layout = synthetic_layout(size)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            expanded = expand_shelf_layout(layout)
+            best = min(best, time.perf_counter() - start)
+        rows = len(expanded)
+        memory_mb = expanded.memory_usage(deep=True).sum() / 1e6
+        print(f"{rows:>10} {best:>9.4f} {best / rows * 1e9:>9.1f} {memory_mb:>7.1f}")
+
+BENCHMARKS = {
+    'expand': bench_expand_shelf_layout,
+    'validations': bench_validations,
+    'writer': bench_writer,
+    'families': bench_family_reader,
+    'save': bench_save,
+    'store': bench_store,
+    'solver': bench_solver,
+    'memory': bench_memory,
+    'bay': bench_bay_lookup,
+    'bulk': bench_bulk_assign,
+    'journal': bench_journal,
+    'history': bench_history,
+    'search': bench_search,
+    'planogram': bench_planogram,
+}
+
+def main():
+    """Run the benchmarks named on the command line, or all of them."""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (choose from {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,112 @@
 import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import column_index_from_string, get_column_letter, quote_sheetname
+from openpyxl.workbook.defined_name import DefinedName
 from openpyxl.worksheet.datavalidation import DataValidation
+import argparse
+import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import hashlib
+import json
+import logging
+import numpy as np
 import os
+import posixpath
+import re
+import struct
+import sys
+import time
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+import zipfile
+
+from shelf_table import blank_mask, is_blank
+
+logger = logging.getLogger(__name__)
+
+# Format of log lines; INFO and DEBUG messages are only shown with --verbose
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
 
 # File paths
 SHELF_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\shelf information.xlsx"
 FAMILY_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\family information.xlsx"
 OUTPUT_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\Shelf_Assignment_Reversed_Output.xlsx"
+STORE_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\Shelf_Assignment_Store.npz"
+
+# File names inside each store directory processed by the batch command
+SHELF_FILE_NAME = "shelf information.xlsx"
+OUTPUT_FILE_NAME = "Shelf_Assignment_Reversed_Output.xlsx"
+STORE_FILE_NAME = "Shelf_Assignment_Store.npz"
+
+# Hidden sheet and named ranges holding the dropdown lists
+LOOKUP_SHEET = "Lists"
+FAMILY_RANGE = "FamilyList"
+FAMILY_TABLE_RANGE = "FamilyTable"  # Family name -> name of its category range
+CATEGORY_RANGE_PREFIX = "Categories_"  # Followed by the family's 1-based position
+NO_CATEGORIES = "No Categories Available"
+
+# Parsed family catalog cached next to the source workbook (JSON, never unpickled)
+FAMILY_CACHE_SUFFIX = ".cache"
+FAMILY_CACHE_VERSION = 2
+
+# Catalogs with at least this many sheets are read on a process pool
+FAMILY_PARALLEL_MIN_SHEETS = 64
+
+# Rows converted to Python values at a time by the streaming writer
+WRITE_CHUNK_ROWS = 10000
+
+# Bytes read at a time when patching cells of an existing workbook
+PATCH_BLOCK_SIZE = 1 << 20
+
+def _compact_int_dtype(max_value):
+    """Return the smallest signed integer dtype that can hold max_value."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def expand_shelf_layout(layout_df):
+    """Expand summary rows (section, aisles, sides, levels max, shelves max) into one row per shelf.
+
+    The coordinates are computed with array arithmetic instead of nested loops, so
+    the only per-shelf storage is the compact integer columns themselves.
+    """
+    sections = layout_df['section'].astype(str).to_numpy()
+    counts = layout_df[['aisles', 'sides', 'levels max', 'shelves max']].to_numpy(dtype=np.int64)
+    num_aisles, num_sides, levels_max, shelves_max = counts.T
+    
+    # Number of shelves produced by each summary row and where each row starts
+    row_sizes = num_aisles * num_sides * levels_max * shelves_max
+    total = int(row_sizes.sum())
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    row_of_shelf = np.repeat(np.arange(len(row_sizes)), row_sizes)
+    
+    # Position of each shelf inside its summary row, decoded as aisle/side/level/shelf digits
+    # (shelf varies fastest, matching the original loop order)
+    position = np.arange(total, dtype=np.int64) - row_starts[row_of_shelf]
+    coordinates = {}
+    for name, radix in (('Shelf', shelves_max), ('Level', levels_max), ('Side', num_sides)):
+        radix = radix[row_of_shelf]
+        coordinates[name] = position % radix + 1
+        position //= radix
+    coordinates['Aisle'] = position + 1
+    
+    # Sections are stored once as categories, each shelf only holds a small code
+    section_names, section_codes = np.unique(sections, return_inverse=True)
+    section_column = pd.Categorical.from_codes(
+        np.repeat(section_codes.astype(_compact_int_dtype(len(section_names))), row_sizes),
+        categories=pd.Index(section_names, dtype=object)
+    )
+    
+    expanded_df = pd.DataFrame({'Section': section_column})
+    for name in ('Aisle', 'Side', 'Level', 'Shelf'):
+        values = coordinates[name]
+        max_value = int(values.max()) if total else 0
+        expanded_df[name] = values.astype(_compact_int_dtype(max_value))
+    return expanded_df
 
 def read_shelf_data(shelf_file):
     """Read shelf data from the input file and expand into individual shelves."""
@@ -17,171 +117,581 @@ def read_shelf_data(shelf_file):
         expected_columns = ['section', 'aisles', 'sides', 'levels max', 'shelves max']
         missing_columns = [col for col in expected_columns if col not in df.columns]
         if missing_columns:
-            print(f"Missing expected columns in shelf data: {missing_columns}")
+            logger.error("Missing expected columns in shelf data: %s", missing_columns)
             return None
         
         # Expand the summarized data into individual shelf entries
-        expanded_data = []
-        for _, row in df.iterrows():
-            section = row['section']
-            num_aisles = int(row['aisles'])
-            num_sides = int(row['sides'])
-            levels_max = int(row['levels max'])
-            shelves_max = int(row['shelves max'])
-            
-            for aisle in range(1, num_aisles + 1):
-                for side in range(1, num_sides + 1):
-                    for level in range(1, levels_max + 1):
-                        # Adjust shelves per level (assuming shelves_max is the max per level)
-                        for shelf in range(1, shelves_max + 1):
-                            expanded_data.append({
-                                'Section': section,
-                                'Aisle': aisle,
-                                'Side': side,
-                                'Level': level,
-                                'Shelf': shelf
-                            })
-        
-        expanded_df = pd.DataFrame(expanded_data)
-        print(f"Read and expanded shelf data. Rows: {len(expanded_df)}")
+        expanded_df = expand_shelf_layout(df)
+        logger.info("Read and expanded shelf data. Rows: %s", len(expanded_df))
         return expanded_df
     except Exception as e:
-        print(f"Error reading shelf data: {str(e)}")
+        logger.error("Error reading shelf data: %s", e)
         return None
 
-def read_family_data(family_file):
-    """Read family data from the input file."""
+def _read_family_headers(family_file, sheet_names):
+    """Return (family, categories) from row 2 of each named sheet, streaming only that row."""
+    wb = load_workbook(family_file, read_only=True, data_only=True)
+    try:
+        headers = []
+        for sheet_name in sheet_names:
+            ws = wb[sheet_name]
+            row = next(ws.iter_rows(min_row=2, max_row=2, values_only=True), ())
+            # Family name is in cell A2, its categories follow from B2 onward
+            family = str(row[0]) if row and row[0] is not None else ""
+            categories = [str(cat) for cat in row[1:] if cat is not None and cat != ""]
+            headers.append((family, categories))
+        return headers
+    finally:
+        wb.close()
+
+def read_family_data(family_file, workers=None):
+    """Read family data from the input file.
+
+    Only row 2 of each sheet is read, in read-only mode. Catalogs with at least
+    FAMILY_PARALLEL_MIN_SHEETS sheets are split across a process pool of `workers`
+    processes (default: one per CPU); pass workers=1 to always read in-process.
+    """
     try:
-        # Read all sheets to aggregate family and category data
-        xls = pd.ExcelFile(family_file)
+        wb = load_workbook(family_file, read_only=True)
+        sheet_names = wb.sheetnames
+        wb.close()
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(sheet_names))
+        if workers > 1 and len(sheet_names) >= FAMILY_PARALLEL_MIN_SHEETS:
+            # Contiguous chunks keep the results in sheet order
+            chunk_size = -(-len(sheet_names) // workers)
+            chunks = [sheet_names[i:i + chunk_size] for i in range(0, len(sheet_names), chunk_size)]
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                results = pool.map(_read_family_headers, [family_file] * len(chunks), chunks)
+                headers = [header for chunk in results for header in chunk]
+        else:
+            headers = _read_family_headers(family_file, sheet_names)
+        
         families_dict = {}
-        for sheet_name in xls.sheet_names:
-            df = pd.read_excel(family_file, sheet_name=sheet_name)
-            # Assume family name is in cell A2 (row 2, column 1 in Excel, so index 0, 0 in pandas)
-            family = str(df.iloc[0, 0]) if not pd.isna(df.iloc[0, 0]) else ""
+        for family, categories in headers:
             if family:
-                # Categories are in row 2, starting from column B (index 1)
-                categories = df.iloc[1, 1:].dropna().tolist()
                 families_dict[family] = categories
-        sub_categories = []
-        for family, cats in families_dict.items():
-            for cat in cats:
-                sub_categories.append((family, cat))
-        print(f"Read family data. Families: {len(families_dict)}")
-        return sub_categories, families_dict
+        logger.info("Read family data. Families: %s", len(families_dict))
+        return _sub_categories(families_dict), families_dict
     except Exception as e:
-        print(f"Error reading family data: {str(e)}")
+        logger.error("Error reading family data: %s", e)
         return None, None
 
+def add_dropdown_validations(wb, ws, families_dict, last_row, family_col="F", category_col="G"):
+    """Add Family and Category dropdowns to rows 2..last_row of ws.
+
+    The lists are written once to a hidden lookup sheet: families in column A, the
+    name of each family's category range in column B, and each family's categories
+    in a column of their own (C onward) behind a named range. The Category dropdown
+    looks up the range for the Family chosen in the same row, so it only offers that
+    family's categories. The sheet holds one validation per column instead of one per cell.
+    """
+    families = list(families_dict.keys())
+    family_categories = [[str(cat) for cat in cats] or [NO_CATEGORIES] for cats in families_dict.values()]
+    range_names = [f"{CATEGORY_RANGE_PREFIX}{idx + 1}" for idx in range(len(families))]
+    
+    # Replace any lookup sheet and names left over from a previous run
+    if LOOKUP_SHEET in wb.sheetnames:
+        wb.remove(wb[LOOKUP_SHEET])
+    for name in list(wb.defined_names):
+        if name in (FAMILY_RANGE, FAMILY_TABLE_RANGE) or name.startswith(CATEGORY_RANGE_PREFIX):
+            del wb.defined_names[name]
+    
+    lookup = wb.create_sheet(LOOKUP_SHEET)
+    lookup.sheet_state = "hidden"
+    num_rows = max([len(families)] + [len(cats) for cats in family_categories])
+    for idx in range(num_rows):
+        row = [families[idx], range_names[idx]] if idx < len(families) else [None, None]
+        row += [cats[idx] if idx < len(cats) else None for cats in family_categories]
+        lookup.append(row)
+    
+    sheet_ref = quote_sheetname(LOOKUP_SHEET)
+    num_families = max(len(families), 1)
+    wb.defined_names[FAMILY_RANGE] = DefinedName(FAMILY_RANGE, attr_text=f"{sheet_ref}!$A$1:$A${num_families}")
+    wb.defined_names[FAMILY_TABLE_RANGE] = DefinedName(FAMILY_TABLE_RANGE, attr_text=f"{sheet_ref}!$A$1:$B${num_families}")
+    for idx, (name, cats) in enumerate(zip(range_names, family_categories)):
+        column = get_column_letter(idx + 3)
+        wb.defined_names[name] = DefinedName(name, attr_text=f"{sheet_ref}!${column}$1:${column}${len(cats)}")
+    
+    if last_row < 2:
+        return
+    # Append directly so this also works on write-only worksheets
+    dv_family = DataValidation(type="list", formula1=FAMILY_RANGE, allow_blank=True)
+    dv_family.add(f"{family_col}2:{family_col}{last_row}")
+    ws.data_validations.append(dv_family)
+    # The row reference is relative, so each row looks up its own Family cell
+    dv_category = DataValidation(
+        type="list",
+        formula1=f"INDIRECT(VLOOKUP(${family_col}2,{FAMILY_TABLE_RANGE},2,FALSE))",
+        allow_blank=True
+    )
+    dv_category.add(f"{category_col}2:{category_col}{last_row}")
+    ws.data_validations.append(dv_category)
+
+def _iter_sheet_rows(df):
+    """Yield the rows of df as lists of plain Python values, converting one chunk at a time."""
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start:start + WRITE_CHUNK_ROWS]
+        columns = []
+        for name in chunk.columns:
+            values = chunk[name].tolist()
+            if not pd.api.types.is_integer_dtype(chunk[name]):
+                # Blank cells instead of "" or NaN, as to_excel would write them
+                values = [None if blank else v for v, blank in zip(values, blank_mask(chunk[name]))]
+            columns.append(values)
+        yield from (list(row) for row in zip(*columns))
+
+def write_shelf_workbook(df, families_dict, output_file):
+    """Write df to output_file with Family/Category dropdowns in a single streaming pass.
+
+    Uses an openpyxl write-only workbook, so rows go straight to disk and memory
+    stays bounded by WRITE_CHUNK_ROWS rather than the size of the store.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    
+    # Bold header row, like DataFrame.to_excel
+    header_font = Font(bold=True)
+    header = []
+    for name in df.columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = header_font
+        header.append(cell)
+    ws.append(header)
+    
+    for row in _iter_sheet_rows(df):
+        ws.append(row)
+    
+    last_row = len(df) + 1
+    columns = list(df.columns)
+    add_dropdown_validations(
+        wb, ws, families_dict, last_row,
+        family_col=get_column_letter(columns.index('Family') + 1),
+        category_col=get_column_letter(columns.index('Category') + 1)
+    )
+    wb.save(output_file)
+    return last_row
+
+def _sub_categories(families_dict):
+    """Return the (family, category) pairs of families_dict in catalog order."""
+    sub_categories = []
+    for family, cats in families_dict.items():
+        for cat in cats:
+            sub_categories.append((family, cat))
+    return sub_categories
+
+def _file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_family_data(family_file):
+    """Return (sub_categories, families_dict), reusing the parsed cache when the file is unchanged.
+
+    The cache is a JSON sidecar (family_file + FAMILY_CACHE_SUFFIX) keyed on the
+    file's size, mtime and content hash. Matching size and mtime is trusted directly;
+    otherwise the content hash decides, so touching the file does not force a re-parse.
+    The sidecar lives in a shared folder, so it only ever holds plain strings and
+    lists; sub_categories is rebuilt from families_dict.
+    """
+    cache_file = family_file + FAMILY_CACHE_SUFFIX
+    stat = os.stat(family_file)
+    
+    cached = None
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if not isinstance(cached, dict) or cached.get('version') != FAMILY_CACHE_VERSION:
+            cached = None
+        elif not isinstance(cached.get('families_dict'), dict):
+            cached = None
+    except (OSError, ValueError):
+        # Missing, damaged, or an older cache format
+        cached = None
+    
+    if cached is not None and cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+        families_dict = cached['families_dict']
+        logger.debug("Read family data from cache. Families: %s", len(families_dict))
+        return _sub_categories(families_dict), families_dict
+    
+    digest = _file_digest(family_file)
+    if cached is not None and cached.get('sha256') == digest:
+        logger.debug("Family file touched but unchanged, reusing cache. Families: %s", len(cached['families_dict']))
+        families_dict = cached['families_dict']
+        sub_categories = _sub_categories(families_dict)
+    else:
+        sub_categories, families_dict = read_family_data(family_file)
+        if families_dict is None:
+            return None, None
+    
+    # Store the parsed catalog with the current fingerprint; a failed write only costs the next run
+    entry = {
+        'version': FAMILY_CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+        'families_dict': families_dict
+    }
+    try:
+        temp_file = cache_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.warning("Could not write family cache %s: %s", cache_file, e)
+    return sub_categories, families_dict
+
+def build_assignment_table(shelf_data):
+    """Return the expanded shelves with empty Family and Category columns."""
+    output_df = shelf_data.copy()
+    output_df['Family'] = ""
+    output_df['Category'] = ""
+    return output_df
+
 def generate_output_file(shelf_data, sub_categories, families_dict, output_file):
     """Generate the output Excel file with dropdowns."""
     try:
         # Prepare the output DataFrame
-        output_df = shelf_data.copy()
-        output_df['Family'] = ""
-        output_df['Category'] = ""
-        
-        # Write the initial output file
-        output_df.to_excel(output_file, index=False)
-        print(f"Initial output file created at: {output_file}")
-        
-        # Load the workbook with openpyxl to add dropdowns
-        wb = load_workbook(output_file)
-        ws = wb.active
+        output_df = build_assignment_table(shelf_data)
         
-        # Get the list of families and all categories
-        family_list = ",".join([f for f, _ in sub_categories])
-        all_categories = set()
-        for _, cats in families_dict.items():
-            all_categories.update(cats)
-        category_list = ",".join(all_categories) if all_categories else "No Categories Available"
-        
-        # Add data validation for each row
-        last_row = ws.max_row
-        for row in range(2, last_row + 1):  # Start from row 2 (after header)
-            # Family dropdown in column F (6th column)
-            dv_family = DataValidation(type="list", formula1=f'"{family_list}"', allow_blank=True)
-            dv_family.add(f"F{row}")
-            ws.add_data_validation(dv_family)
-            
-            # Category dropdown in column G (7th column)
-            dv_category = DataValidation(type="list", formula1=f'"{category_list}"', allow_blank=True)
-            dv_category.add(f"G{row}")
-            ws.add_data_validation(dv_category)
-        
-        # Save the workbook with dropdowns
-        wb.save(output_file)
-        print(f"Dropdowns added to output file. Rows processed: {last_row - 1}")
+        # Stream the rows and dropdowns into the workbook in one write
+        last_row = write_shelf_workbook(output_df, families_dict, output_file)
+        logger.info("Output file with dropdowns created at: %s. Rows processed: %s", output_file, last_row - 1)
     except Exception as e:
-        print(f"Error generating output file: {str(e)}")
+        logger.error("Error generating output file: %s", e)
         raise
 
-def save_updated_data(output_file):
-    """Read the output file, preserve user selections, and save back."""
+def _first_sheet_part(zin):
+    """Return the zip member name of the first worksheet in an xlsx archive."""
+    ns = {
+        'main': "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+        'rel': "http://schemas.openxmlformats.org/package/2006/relationships"
+    }
+    rel_id_attr = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+    workbook = ElementTree.fromstring(zin.read("xl/workbook.xml"))
+    rel_id = workbook.find("main:sheets/main:sheet", ns).get(rel_id_attr)
+    rels = ElementTree.fromstring(zin.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.findall("rel:Relationship", ns):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise ValueError("Workbook has no first worksheet")
+
+def _inline_string_cell(ref, value, style):
+    """Return the XML for a cell holding value as an inline string, or None for a blank cell."""
+    if is_blank(value):
+        return None
+    text = escape(str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'.encode("utf-8")
+
+def _patch_row(row_xml, row_num, values):
+    """Return row_xml with the cells in values ({column letter: value}) replaced."""
+    if row_xml.endswith(b"/>"):
+        open_tag, inner = row_xml[:-2] + b">", b""
+    else:
+        tag_end = row_xml.index(b">") + 1
+        open_tag, inner = row_xml[:tag_end], row_xml[tag_end:-len(b"</row>")]
+    
+    cells = {}
+    for cell in re.findall(rb'<c\b[^>]*?(?:/>|>.*?</c>)', inner, re.S):
+        column = re.match(rb'<c\b[^>]*?\br="([A-Z]+)', cell).group(1).decode()
+        cells[column] = cell
+    for column, value in values.items():
+        # Keep the cell's existing style so formatting survives the edit
+        style = re.search(rb'\bs="(\d+)"', cells.get(column, b""))
+        style = f' s="{style.group(1).decode()}"' if style else ""
+        cell = _inline_string_cell(f"{column}{row_num}", value, style)
+        if cell is None:
+            cells.pop(column, None)
+        else:
+            cells[column] = cell
+    ordered = sorted(cells.items(), key=lambda item: column_index_from_string(item[0]))
+    return open_tag + b"".join(cell for _, cell in ordered) + b"</row>"
+
+def _copy_member_raw(src, info, zout):
+    """Append member info of the open archive file src to zout as its stored compressed bytes.
+
+    zipfile has no public call for this, so it mirrors what ZipFile.open(..., "w")
+    does around the data: header at start_dir, then register the member.
+    """
+    src.seek(info.header_offset)
+    header = src.read(30)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    src.seek(info.header_offset + 30 + name_length + extra_length)
+    
+    copied = copy.copy(info)
+    copied.flag_bits &= ~0x08  # Sizes and CRC go in the header, not in a trailing data descriptor
+    zout.fp.seek(zout.start_dir)
+    copied.header_offset = zout.fp.tell()
+    zout._writecheck(copied)
+    zout._didModify = True
+    zout.fp.write(copied.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        block = src.read(min(remaining, PATCH_BLOCK_SIZE))
+        if not block:
+            raise zipfile.BadZipFile(f"Member {info.filename} is truncated")
+        zout.fp.write(block)
+        remaining -= len(block)
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(copied)
+    zout.NameToInfo[copied.filename] = copied
+
+def _patch_sheet_stream(src, dst, updates, family_col, category_col):
+    """Copy the sheet XML from src to dst block by block, rewriting the rows in updates.
+
+    Returns the number of the first row not found (nothing is patched past it), or None.
+    """
+    buffer = b""
+    eof = False
+    
+    def read_more():
+        nonlocal buffer, eof
+        block = src.read(PATCH_BLOCK_SIZE)
+        eof = not block
+        buffer += block
+        return not eof
+    
+    # Rows are stored in ascending order, so one forward pass finds them all
+    for position in sorted(updates):
+        row_num = position + 2  # Row 1 is the header
+        pattern = re.compile(rb'<row\b[^>]*?\br="%d"[^>]*?(/?)>' % row_num)
+        while True:
+            match = pattern.search(buffer)
+            if match is not None:
+                end = match.end() if match.group(1) else buffer.find(b"</row>", match.end())
+                if end >= 0:
+                    break
+            else:
+                # Pass on everything before the last tag, which may be cut short by the block boundary
+                keep = buffer.rfind(b"<")
+                keep = len(buffer) if keep < 0 else keep
+                dst.write(buffer[:keep])
+                buffer = buffer[keep:]
+            if not read_more():
+                return row_num
+        if not match.group(1):
+            end += len(b"</row>")
+        family, category = updates[position]
+        dst.write(buffer[:match.start()])
+        dst.write(_patch_row(buffer[match.start():end], row_num, {family_col: family, category_col: category}))
+        buffer = buffer[end:]
+    
+    dst.write(buffer)
+    buffer = b""
+    while read_more():
+        dst.write(buffer)
+        buffer = b""
+    return None
+
+def patch_output_cells(output_file, updates, family_col="F", category_col="G"):
+    """Write changed Family/Category values into output_file without rebuilding the workbook.
+
+    updates maps 0-based data row positions to (family, category). Only the <row>
+    elements of those rows are rewritten in the first sheet's XML. Every other part of
+    the archive, including data validations, lookup sheet and styles, is copied as its
+    compressed bytes without being inflated or deflated again.
+    Returns False (leaving the file untouched) if a row is missing from the sheet.
+    
+    The sheet XML itself is streamed through once, inflated, scanned and deflated
+    again in PATCH_BLOCK_SIZE blocks, because a deflate stream cannot be changed in
+    the middle. Memory stays bounded, but that pass still grows with the number of
+    rows in the sheet, not with the number of edits.
+    """
+    if not updates:
+        return True
+    temp_file = output_file + ".tmp"
+    with zipfile.ZipFile(output_file) as zin, open(output_file, "rb") as src, zipfile.ZipFile(temp_file, "w") as zout:
+        sheet_part = _first_sheet_part(zin)
+        missing = None
+        for item in zin.infolist():
+            if item.filename != sheet_part:
+                _copy_member_raw(src, item, zout)
+                continue
+            info = zipfile.ZipInfo(item.filename, item.date_time)
+            info.compress_type = item.compress_type
+            info.external_attr = item.external_attr
+            with zin.open(item) as sheet_in, zout.open(info, "w", force_zip64=item.file_size * 1.05 > zipfile.ZIP64_LIMIT) as sheet_out:
+                missing = _patch_sheet_stream(sheet_in, sheet_out, updates, family_col, category_col)
+            if missing is not None:
+                break
+    if missing is not None:
+        os.remove(temp_file)
+        logger.info("Row %s not found in %s; cannot patch in place", missing, output_file)
+        return False
+    os.replace(temp_file, output_file)
+    return True
+
+def save_updated_data(output_file, updates=None):
+    """Save changed Family/Category values back to the output file.
+
+    updates maps 0-based data row positions to (family, category); only those cells
+    are written, and the existing dropdowns and formatting are left untouched.
+    """
     try:
-        # Read the current output file
-        df = pd.read_excel(output_file)
-        print(f"Read updated output file. Rows: {len(df)}")
-        
-        # Overwrite the file with the updated data (preserving dropdowns)
-        df.to_excel(output_file, index=False)
-        print(f"Updated data saved back to: {output_file}")
-        
-        # Re-add dropdowns using openpyxl
-        wb = load_workbook(output_file)
-        ws = wb.active
-        
-        # Rebuild family and category lists (assuming original data is still available)
-        _, families_dict = read_family_data(FAMILY_FILE)
-        family_list = ",".join(families_dict.keys())
-        all_categories = set()
-        for cats in families_dict.values():
-            all_categories.update(cats)
-        category_list = ",".join(all_categories) if all_categories else "No Categories Available"
-        
-        # Add data validation for each row
-        last_row = ws.max_row
-        for row in range(2, last_row + 1):
-            dv_family = DataValidation(type="list", formula1=f'"{family_list}"', allow_blank=True)
-            dv_family.add(f"F{row}")
-            ws.add_data_validation(dv_family)
-            
-            dv_category = DataValidation(type="list", formula1=f'"{category_list}"', allow_blank=True)
-            dv_category.add(f"G{row}")
-            ws.add_data_validation(dv_category)
-        
-        wb.save(output_file)
-        print(f"Dropdowns re-added after saving updated data")
+        if not updates:
+            logger.info("No changes to save")
+            return
+        if not patch_output_cells(output_file, updates):
+            raise ValueError(f"Could not patch {output_file} in place")
+        logger.info("Updated %s rows in: %s", len(updates), output_file)
     except Exception as e:
-        print(f"Error saving updated data: {str(e)}")
+        logger.error("Error saving updated data: %s", e)
         raise
 
-def main():
-    """Main function to generate the output file and optionally save updated data."""
+def save_working_store(shelf_data, store_file):
+    """Create the working store edited by the GUI with empty Family/Category columns."""
+    # shelf_store builds on this module, so import it here rather than at the top
+    from shelf_store import ChangeJournal, open_store
+    ChangeJournal(store_file).discard()
+    open_store(store_file).save(build_assignment_table(shelf_data))
+    logger.info("Working store created at: %s", store_file)
+
+def generate_store(shelf_file, sub_categories, families_dict, output_file, store_file):
+    """Expand one store's shelf layout into its working store and Excel output. Returns the row count."""
+    shelf_data = read_shelf_data(shelf_file)
+    if shelf_data is None:
+        raise ValueError(f"Could not read shelf data from {shelf_file}")
+    save_working_store(shelf_data, store_file)
+    generate_output_file(shelf_data, sub_categories, families_dict, output_file)
+    # shelf_store builds on this module, so import it here rather than at the top
+    from shelf_store import record_excel_sync
+    record_excel_sync(store_file, output_file)
+    return len(shelf_data)
+
+def read_manifest(manifest_file):
+    """Return the store directories or glob patterns listed in a manifest, one per line ('#' starts a comment)."""
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    patterns = []
+    with open(manifest_file, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                # Relative entries are resolved against the manifest's own directory
+                patterns.append(os.path.join(base_dir, line))
+    return patterns
+
+def expand_store_patterns(patterns):
+    """Expand directory globs into a de-duplicated list of store directories, in order."""
+    store_dirs = []
+    for pattern in patterns:
+        matches = sorted(path for path in glob.glob(pattern) if os.path.isdir(path))
+        # Keep unmatched literal paths so they are reported as failures rather than skipped
+        for path in matches or [pattern]:
+            path = os.path.abspath(path)
+            if path not in store_dirs:
+                store_dirs.append(path)
+    return store_dirs
+
+# Family catalog shared by every task in a batch worker process
+_batch_families = (None, None)
+
+def configure_logging(verbose=False):
+    """Log warnings and errors only, or everything down to DEBUG when verbose."""
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.WARNING, format=LOG_FORMAT)
+
+def _init_batch_worker(sub_categories, families_dict, verbose=False):
+    """Receive the family catalog parsed by the parent process once per worker."""
+    global _batch_families
+    _batch_families = (sub_categories, families_dict)
+    # Spawned workers do not inherit the parent's logging setup
+    configure_logging(verbose)
+
+def _generate_store_task(store_dir):
+    """Batch task: generate one store directory, returning (rows, seconds, error)."""
+    start = time.perf_counter()
+    try:
+        sub_categories, families_dict = _batch_families
+        rows = generate_store(
+            os.path.join(store_dir, SHELF_FILE_NAME), sub_categories, families_dict,
+            os.path.join(store_dir, OUTPUT_FILE_NAME), os.path.join(store_dir, STORE_FILE_NAME)
+        )
+        return rows, time.perf_counter() - start, None
+    except Exception as e:
+        return 0, time.perf_counter() - start, f"{type(e).__name__}: {str(e)}"
+
+def run_batch(store_dirs, family_file, workers=None):
+    """Generate every store directory on a process pool; a failing store does not stop the batch.
+
+    Prints one line per store with its timing and a summary; failures are also logged.
+    Returns {store_dir: (rows, seconds, error)} where error is None on success.
+    """
+    sub_categories, families_dict = load_family_data(family_file)
+    if families_dict is None:
+        raise ValueError(f"Could not read family data from {family_file}")
+    
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(sub_categories, families_dict, logger.isEnabledFor(logging.DEBUG))) as pool:
+        futures = {pool.submit(_generate_store_task, store_dir): store_dir for store_dir in store_dirs}
+        for future in as_completed(futures):
+            store_dir = futures[future]
+            try:
+                results[store_dir] = future.result()
+            except Exception as e:
+                # The worker process itself died
+                results[store_dir] = (0, 0.0, f"{type(e).__name__}: {str(e)}")
+            rows, seconds, error = results[store_dir]
+            status = f"FAILED {error}" if error else f"{rows} rows"
+            # The per-store report is the command's output, so it goes to stdout whatever the log level
+            print(f"[{len(results)}/{len(store_dirs)}] {store_dir}: {status} ({seconds:.2f}s)", flush=True)
+    
+    failures = [store_dir for store_dir, (_, _, error) in results.items() if error]
+    print(f"Batch finished in {time.perf_counter() - start:.2f}s: "
+          f"{len(store_dirs) - len(failures)} succeeded, {len(failures)} failed")
+    for store_dir in failures:
+        logger.error("Store %s failed: %s", store_dir, results[store_dir][2])
+    return results
+
+def main(argv=None):
+    """Generate the output for the configured store, or for many store directories in batch mode."""
+    parser = argparse.ArgumentParser(description="Generate shelf assignment outputs.")
+    parser.add_argument("stores", nargs="*",
+                        help="store directories or glob patterns (each holding a shelf information.xlsx)")
+    parser.add_argument("-m", "--manifest", help="file listing store directories or glob patterns, one per line")
+    parser.add_argument("-f", "--family-file", default=FAMILY_FILE, help="family catalog shared by all stores")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress and diagnostics")
+    args = parser.parse_args(argv)
+    configure_logging(args.verbose)
+    
+    patterns = list(args.stores)
+    if args.manifest:
+        patterns += read_manifest(args.manifest)
+    if patterns:
+        if not os.path.exists(args.family_file):
+            logger.error("Family file not found: %s", args.family_file)
+            return 1
+        results = run_batch(expand_store_patterns(patterns), args.family_file, args.workers)
+        return 1 if any(error for _, _, error in results.values()) else 0
+    
     # Validate input files
     if not os.path.exists(SHELF_FILE):
-        print(f"Shelf file not found: {SHELF_FILE}")
-        return
-    if not os.path.exists(FAMILY_FILE):
-        print(f"Family file not found: {FAMILY_FILE}")
-        return
+        logger.error("Shelf file not found: %s", SHELF_FILE)
+        return 1
+    if not os.path.exists(args.family_file):
+        logger.error("Family file not found: %s", args.family_file)
+        return 1
     
     # Read input data
-    shelf_data = read_shelf_data(SHELF_FILE)
-    if shelf_data is None:
-        return
-    
-    sub_categories, families_dict = read_family_data(FAMILY_FILE)
+    sub_categories, families_dict = load_family_data(args.family_file)
     if sub_categories is None:
-        return
+        return 1
     
-    # Generate the output file with dropdowns
-    generate_output_file(shelf_data, sub_categories, families_dict, OUTPUT_FILE)
+    # Create the working store edited by the GUI and export the output file with dropdowns
+    generate_store(SHELF_FILE, sub_categories, families_dict, OUTPUT_FILE, STORE_FILE)
     
-    # Optionally save updated data (uncomment to use after making selections)
-    # print("Make your selections in the output file, then press Enter to save changes.")
-    # input()
-    # save_updated_data(OUTPUT_FILE)
+    # Assignments are edited in shelf_assignment_gui.py, which saves them to the store and exports them to Excel
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -1,58 +1,164 @@
+import numpy as np
 import pandas as pd
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, messagebox
+import argparse
+import itertools
+import logging
+import math
 import os
+import queue
+import threading
+import time
+
+from generate_shelf_assignment import configure_logging, load_family_data, write_shelf_workbook
+from shelf_geometry import (FACE_COLORS, LABEL_FONT_BASE, LABEL_SPACE_LEFT, LABEL_SPACE_TOP, PALETTE, SHELF_FONT_BASE, TEXT_PADDING,
+                            base_cell_size, cell_faces, cell_rect, grid_size, level_label_position,
+                            shelf_label_position, store_palette, text_position, wrap_label)
+from shelf_search import SearchIndex, filter_rows
+from shelf_store import ChangeJournal, excel_changed, import_excel, open_store, record_excel_sync
+from shelf_table import EditHistory, ShelfIndex, bay_summary, bulk_assign, set_cell, to_compact
+
+logger = logging.getLogger(__name__)
 
 # File paths
 FAMILY_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\family information.xlsx"
 OUTPUT_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\Shelf_Assignment_Reversed_Output.xlsx"
+# Working copy of the assignment table; the Excel file above is imported/exported explicitly
+STORE_FILE = r"C:\Users\User\OneDrive - ensonmarket.com\shelf assignment\Shelf_Assignment_Store.npz"
+
+# Shortest time between two Shelf View renders (about one frame at 60 Hz)
+REDRAW_INTERVAL_MS = 16
+# Rows kept in the Table View above and below the visible ones
+TABLE_BUFFER_ROWS = 50
+# How often the Tk thread checks for data from the loader threads
+LOAD_POLL_MS = 50
+# Table View status shown when a cell is clicked before editing is available
+LOADING_EDIT_MESSAGE = "Still loading families, editing is available in a moment"
+# How often journalled edits are folded into the working store in the background
+AUTOSAVE_MS = 30000
+# Pause in typing after which the dropdown list is shown again / the table filter runs
+SEARCH_DELAY_MS = 250
+# Wrapped shelf labels kept for reuse; the cache is emptied when it grows past this
+LABEL_CACHE_SIZE = 20000
+
+# Store overview map, in world units of one shelf width
+OVERVIEW_LEVEL_HEIGHT = 1.3  # Height of a level relative to a shelf's width, as in the Shelf View
+OVERVIEW_BAY_GAP = 2  # Space between bays of a section
+OVERVIEW_SECTION_GAP = 6  # Space between sections
+# Zoom levels (pixels per shelf width) at which more detail is drawn
+OVERVIEW_CELL_PX = 12  # Below: one color block per bay; above: one block per shelf
+OVERVIEW_LABEL_PX = 45  # Above: full 3D shelves with category labels, as in the Shelf View
+OVERVIEW_ZOOM_STEP = 1.25
+# Pause in dragging after which the overview is rendered again (until then it is only moved)
+OVERVIEW_PAN_SETTLE_MS = 120
+
+def ensure_assignment_columns(df):
+    """Add empty Family and Category columns to df if it lacks them; returns df."""
+    if 'Family' not in df.columns:
+        df['Family'] = ""
+    if 'Category' not in df.columns:
+        df['Category'] = ""
+    return df
+
+def range_difference(outer, inner):
+    """Yield the (level, shelf) cells of range outer that are not in range inner.
+
+    Ranges are (first shelf, last shelf, first level, last level) tuples or None
+    (no cells). Only the cells of the difference are visited: the levels of outer
+    outside inner in full, and for the shared levels the shelves outside inner.
+    """
+    if outer is None:
+        return
+    first_shelf, last_shelf, first_level, last_level = outer
+    if inner is None:
+        inner = (0, -1, 0, -1)
+    inner_first_shelf, inner_last_shelf, inner_first_level, inner_last_level = inner
+    for level in range(first_level, last_level + 1):
+        if inner_first_level <= level <= inner_last_level:
+            # Shelves left and right of inner on a level both ranges cover
+            shelves = itertools.chain(range(first_shelf, min(last_shelf, inner_first_shelf - 1) + 1),
+                                      range(max(first_shelf, inner_last_shelf + 1), last_shelf + 1))
+        else:
+            shelves = range(first_shelf, last_shelf + 1)
+        for shelf in shelves:
+            yield level, shelf
 
 class ShelfAssignmentApp:
     def __init__(self, root):
+        self.start_time = time.perf_counter()  # Start of the time-to-first-paint measurement
         self.root = root
         self.root.title("Shelf Assignment Editor")
         
         # Set the window size for a large screen
         self.root.geometry("1200x800")  # Adjusted for a 20+ inch screen
-        print("Initializing ShelfAssignmentApp with window size 1200x800")
+        logger.debug("Initializing ShelfAssignmentApp with window size 1200x800")
         
         # Initialize data
         self.df = None
         self.families = []
         self.categories = {}
         self.full_values = []  # To store the full list of values for filtering
+        self.search_indexes = {}  # (values, type-ahead index) per dropdown list (families, or one family's categories)
+        self.dropdown_search = None  # Index of the list in the open editing dropdown
+        self.search_job = None  # Pending re-post of the dropdown list
+        self.filter_job = None  # Pending run of the table filter
+        self.dirty_rows = set()  # Row positions edited since the last save
+        self.journal = None  # Change journal of the working store, opened with the table
+        self.compaction = None  # Background thread saving the journalled edits to the store
+        self.compaction_error = None
+        self.history = EditHistory()  # Undo/redo of apply and Table View edits
+        self.editing_ready = False  # Table View edits wait for the families and the Shelf View
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Apply a modern theme and custom styles
         self.style = ttk.Style()
         self.style.theme_use('clam')  # Use the 'clam' theme for a modern look
-        print("Applying styles with 'clam' theme")
+        logger.debug("Applying styles with 'clam' theme")
         self.apply_styles()
         
-        # Load data
-        print("Loading data...")
-        self.load_data()
+        # Progress indicator shown until every tab has its data
+        self.loading_frame = ttk.Frame(self.root, style="Custom.TFrame")
+        self.loading_frame.pack(fill="x", padx=10, pady=(10, 0))
+        self.loading_var = tk.StringVar(value="Loading families and assignment table...")
+        ttk.Label(self.loading_frame, textvariable=self.loading_var, font=self.large_font, background="#e6ecf0").pack(side="left", padx=5)
+        self.progress = ttk.Progressbar(self.loading_frame, mode="indeterminate", length=300)
+        self.progress.pack(side="left", padx=10)
+        self.progress.start(10)
         
         # Create tabbed interface
-        print("Creating ttk.Notebook for tabbed interface")
+        logger.debug("Creating ttk.Notebook for tabbed interface")
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Create tabs
+        # Create tabs; each shows a placeholder until its data has been loaded
         self.table_tab = ttk.Frame(self.notebook, style="Custom.TFrame")
         self.shelf_tab = ttk.Frame(self.notebook, style="Custom.TFrame")
+        self.overview_tab = ttk.Frame(self.notebook, style="Custom.TFrame")
         self.notebook.add(self.table_tab, text="Table View")
         self.notebook.add(self.shelf_tab, text="Shelf View")
-        print("Tabs created: Table View, Shelf View")
-        
-        # Create GUI elements for each tab
-        print("Creating Table View tab...")
-        self.create_table_tab()
-        print("Creating Shelf View tab...")
-        try:
-            self.create_shelf_tab()
-        except Exception as e:
-            print(f"Error creating Shelf View tab: {str(e)}")
-            messagebox.showerror("Error", f"Failed to create Shelf View tab: {str(e)}")
+        self.notebook.add(self.overview_tab, text="Store Overview")
+        logger.debug("Tabs created: Table View, Shelf View, Store Overview")
+        self.placeholders = {}
+        for name, tab in (("table", self.table_tab), ("shelf", self.shelf_tab), ("overview", self.overview_tab)):
+            self.placeholders[name] = ttk.Label(tab, text="Loading...", font=self.large_font, background="#e6ecf0")
+            self.placeholders[name].pack(pady=40)
+        
+        # Read the family file and the assignment table on worker threads, at the same time
+        logger.debug("Loading data...")
+        self.loaded = set()
+        self.load_queue = queue.Queue()
+        for name, loader in (("families", self.load_families), ("table", self.load_table)):
+            threading.Thread(target=self.run_loader, args=(name, loader), daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self.poll_loading)
+        self.first_paint = None  # Seconds from start to the first paint, shown once loading is done
+        self.root.after_idle(self.record_first_paint)
+
+    def record_first_paint(self):
+        """Note the time to first paint; called once the window is first drawn."""
+        self.first_paint = time.perf_counter() - self.start_time
+        logger.info("First paint after %.3f s", self.first_paint)
 
     def apply_styles(self):
         """Apply custom styles for a more artistic and readable GUI."""
@@ -60,16 +166,17 @@ class ShelfAssignmentApp:
         self.large_font = ('Helvetica', 14)  # Larger font for better readability
         self.dropdown_font = ('Helvetica', 16)  # Larger font for dropdown values
         self.button_font = ('Helvetica', 16, 'bold')
-        self.shelf_text_font_base = 8  # Smaller base font size for shelf text labels
-        self.label_font_base = 10  # Base font size for level and shelf labels
+        self.shelf_text_font_base = SHELF_FONT_BASE  # Smaller base font size for shelf text labels
+        self.label_font_base = LABEL_FONT_BASE  # Base font size for level and shelf labels
         
         # Create a custom style for frames with background color
         self.style.configure("Custom.TFrame", background="#e6ecf0")  # Light grayish-blue background
         
         # Configure Treeview style (table)
+        self.tree_row_height = 40  # Increase row height to fit larger font
         self.style.configure("Treeview",
                              font=self.large_font,
-                             rowheight=40,  # Increase row height to fit larger font
+                             rowheight=self.tree_row_height,
                              background="#f0f4f8",  # Light grayish-blue background
                              foreground="#333333",  # Dark gray text
                              fieldbackground="#f0f4f8")
@@ -109,97 +216,164 @@ class ShelfAssignmentApp:
         self.style.configure("TCombobox.Listbox",
                              font=self.dropdown_font)
 
-    def load_data(self):
-        """Load data from the Excel files."""
+    def load_families(self):
+        """Read families and categories from the family file (cached between runs). Runs on a worker thread."""
+        _, families_dict = load_family_data(FAMILY_FILE)
+        if families_dict is None:
+            raise ValueError(f"Could not read family data from {FAMILY_FILE}")
+        return families_dict
+
+    def load_table(self):
+        """Read the working store, importing the Excel output file the first time. Runs on a worker thread."""
+        store = open_store(STORE_FILE)
+        excel_newer = False
+        if store.exists():
+            df = store.load()
+            # Edits made in the exported workbook are only picked up by an import
+            excel_newer = excel_changed(store.path, OUTPUT_FILE)
+        elif os.path.exists(OUTPUT_FILE):
+            logger.info("Store not found, importing %s", OUTPUT_FILE)
+            df = import_excel(OUTPUT_FILE, store)
+        else:
+            raise FileNotFoundError(f"Neither the store nor the output file was found: {STORE_FILE}, {OUTPUT_FILE}")
+        logger.info("Read assignment table. Rows: %s", len(df))
+        logger.debug("Columns in assignment table: %s", list(df.columns))
+        
+        # Hold the table in compact form: categorical text columns and small integer coordinates
+        df = to_compact(ensure_assignment_columns(df))
+        
+        # Re-apply edits journalled after the last save (e.g. before a crash)
+        journal = ChangeJournal(store.path)
+        edited = journal.replay(df)
+        return store, df, ShelfIndex(df), journal, edited, excel_newer
+
+    def run_loader(self, name, loader):
+        """Run loader on this worker thread and hand its result (or error) to the Tk thread."""
         try:
-            # Read the output file
-            if not os.path.exists(OUTPUT_FILE):
-                messagebox.showerror("Error", f"Output file not found: {OUTPUT_FILE}")
+            self.load_queue.put((name, loader(), None))
+        except Exception as e:
+            self.load_queue.put((name, None, e))
+
+    def poll_loading(self):
+        """Take finished loads off the queue and fill in the tabs whose data is complete."""
+        while True:
+            try:
+                name, result, error = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                logger.error("Error loading data: %s", error)
+                messagebox.showerror("Error", f"Error loading data: {str(error)}")
                 self.root.destroy()
                 return
-            self.df = pd.read_excel(OUTPUT_FILE)
-            print(f"Read output file. Rows: {len(self.df)}")
-            print(f"Columns in output file: {list(self.df.columns)}")
-            
-            # Read family information to get families and categories
-            xls = pd.ExcelFile(FAMILY_FILE)
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(FAMILY_FILE, sheet_name=sheet_name)
-                print(f"\nReading sheet: {sheet_name}")
-                
-                # Log the raw data for the first few rows to understand the structure
-                print(f"First few rows of the sheet:\n{df.head()}")
-                
-                # Read family name from cell A2 (row 2 in Excel, index 0 in pandas)
-                family_row = 0  # Index 0 corresponds to row 2 in Excel
-                family = str(df.iloc[family_row, 0]) if not pd.isna(df.iloc[family_row, 0]) else ""
-                print(f"Family in cell A2 (row 2, index {family_row}): {family}")
-                
-                if family:
-                    # Categories are in the same row as the family (row 2 in Excel, index 0 in pandas)
-                    category_row = family_row  # Same row as the family
-                    categories = df.iloc[category_row, 1:].dropna().tolist()
-                    print(f"Raw categories in row 2 (B2 onward, index {category_row}): {categories}")
-                    
-                    # Ensure categories are strings
-                    categories = [str(cat) for cat in categories]
-                    print(f"Categories after converting to strings: {categories}")
-                    
-                    self.families.append(family)
-                    self.categories[family] = categories
-            print(f"\nFamilies loaded: {self.families}")
-            print(f"Categories loaded: {self.categories}")
+            self.loaded.add(name)
+            elapsed = time.perf_counter() - self.start_time
             
-            # Ensure Family and Category columns exist
-            if 'Family' not in self.df.columns:
-                self.df['Family'] = ""
-            if 'Category' not in self.df.columns:
-                self.df['Category'] = ""
+            if name == "families":
+                self.families = list(result.keys())
+                self.categories = result
+                logger.info("Families loaded after %.3f s: %s families", elapsed, len(self.families))
+                logger.debug("Families loaded: %s", self.families)
+                logger.debug("Categories loaded: %s", self.categories)
+            else:
+                self.store, self.df, self.shelf_index, self.journal, edited, self.excel_newer = result
+                self.dirty_rows.update(edited)
+                logger.debug("Creating Table View tab...")
+                self.placeholders.pop("table").destroy()
+                self.create_table_tab()
+                logger.info("Table View ready after %.3f s", time.perf_counter() - self.start_time)
+            self.loading_var.set(f"Loaded {' and '.join(sorted(self.loaded))} after {elapsed:.1f} s...")
+        
+        if self.loaded != {"families", "table"}:
+            self.root.after(LOAD_POLL_MS, self.poll_loading)
+            return
+        
+        # Both loads are in: register the catalog in the compact table and build the Shelf View
+        self.df = to_compact(self.df, self.categories)
+        if hasattr(self.store, 'families_dict'):
+            self.store.families_dict = self.categories
+        logger.debug("Creating Shelf View tab...")
+        self.placeholders.pop("shelf").destroy()
+        try:
+            self.create_shelf_tab()
+            self.editing_ready = True
         except Exception as e:
-            print(f"Error loading data: {str(e)}")
-            messagebox.showerror("Error", f"Error loading data: {str(e)}")
-            self.root.destroy()
+            logger.error("Error creating Shelf View tab: %s", e)
+            messagebox.showerror("Error", f"Failed to create Shelf View tab: {str(e)}")
+        self.placeholders.pop("overview").destroy()
+        self.create_overview_tab()
+        self.progress.stop()
+        self.loading_frame.destroy()
+        elapsed = time.perf_counter() - self.start_time
+        if self.table_status_var.get() in ("", LOADING_EDIT_MESSAGE):
+            first_paint = f" (first paint {self.first_paint:.2f} s)" if self.first_paint is not None else ""
+            self.table_status_var.set(f"Ready after {elapsed:.1f} s{first_paint}")
+        logger.info("Shelf View ready after %.3f s", elapsed)
+        self.root.after(AUTOSAVE_MS, self.autosave)
+        if self.excel_newer and self.editing_ready:
+            logger.warning("%s was changed after it was last imported or exported", OUTPUT_FILE)
+            if messagebox.askyesno("Excel file changed",
+                                   f"{OUTPUT_FILE} was changed since it was last imported or exported.\n"
+                                   "Import it now? Assignments in the store that are not in that file are replaced."):
+                self.import_data(confirm=False)
 
     def create_table_tab(self):
-        """Create the table view tab (original GUI)."""
+        """Create the table view tab (original GUI).
+
+        The Treeview is virtual: it only holds the visible rows plus TABLE_BUFFER_ROWS
+        on either side, and is refilled from the DataFrame as the user scrolls. Item ids
+        are the row positions in the DataFrame, as before.
+        """
         # Create main frame
         frame = ttk.Frame(self.table_tab, style="Custom.TFrame")
         frame.pack(padx=20, pady=20, fill="both", expand=True)
-        print("Created main frame for Table View tab")
+        logger.debug("Created main frame for Table View tab")
         
         # Create Treeview to display data
         columns = list(self.df.columns)
         self.tree = ttk.Treeview(frame, columns=columns, show="headings", style="Treeview")
-        print("Created Treeview with columns:", columns)
+        logger.debug("Created Treeview with columns: %s", columns)
         
         # Set column headings and widths
         for col in columns:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=150)  # Increased width for larger font
         
-        # Insert data into Treeview
-        for idx, row in self.df.iterrows():
-            self.tree.insert("", tk.END, values=list(row), iid=str(idx))
-        print(f"Inserted {len(self.df)} rows into Treeview")
-        
-        # Add scrollbars
-        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        # Add scrollbars; the vertical one scrolls through the whole table, not the Treeview items
+        self.table_vsb = ttk.Scrollbar(frame, orient="vertical", command=self.scroll_table)
         hsb = ttk.Scrollbar(frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        print("Added scrollbars to Treeview")
+        self.tree.configure(xscrollcommand=hsb.set)
+        logger.debug("Added scrollbars to Treeview")
         
         # Layout Treeview and scrollbars
         self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.table_vsb.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
         frame.grid_rowconfigure(0, weight=1)
         frame.grid_columnconfigure(0, weight=1)
-        print("Laid out Treeview and scrollbars")
+        logger.debug("Laid out Treeview and scrollbars")
         
-        # Create Save button
-        save_button = ttk.Button(frame, text="Save", command=self.save_data, style="TButton")
-        save_button.grid(row=2, column=0, pady=20)
-        print("Added Save button to Table View tab")
+        # Create Save, Export and Import buttons
+        button_frame = ttk.Frame(frame, style="Custom.TFrame")
+        button_frame.grid(row=2, column=0, pady=20)
+        save_button = ttk.Button(button_frame, text="Save", command=self.save_data, style="TButton")
+        save_button.grid(row=0, column=0, padx=5)
+        export_button = ttk.Button(button_frame, text="Export to Excel", command=self.export_data, style="TButton")
+        export_button.grid(row=0, column=1, padx=5)
+        import_button = ttk.Button(button_frame, text="Import from Excel", command=self.import_data, style="TButton")
+        import_button.grid(row=0, column=2, padx=5)
+        self.table_status_var = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.table_status_var, font=self.large_font, background="#e6ecf0").grid(row=0, column=5, padx=15)
+        logger.debug("Added Save, Export and Import buttons to Table View tab")
+        
+        # Table-wide filter, e.g. "category:milk" or "unassigned aisle:3"
+        ttk.Label(button_frame, text="Filter:", font=self.large_font, background="#e6ecf0").grid(row=0, column=3, padx=(20, 5))
+        self.filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(button_frame, textvariable=self.filter_var, font=self.large_font, width=30)
+        filter_entry.grid(row=0, column=4, padx=5)
+        filter_entry.bind("<Return>", lambda event: self.apply_filter())
+        filter_entry.bind("<KeyRelease>", self.on_filter_key)
+        logger.debug("Added filter entry to Table View tab")
         
         # Variables for editing
         self.current_edit = None
@@ -207,51 +381,144 @@ class ShelfAssignmentApp:
         
         # Bind single-click to edit cells
         self.tree.bind("<Button-1>", self.on_single_click)
-        print("Bound single-click event to Treeview")
+        logger.debug("Bound single-click event to Treeview")
+        
+        # Scrolling and resizing refill the materialized window of rows
+        self.tree.bind("<MouseWheel>", self.on_table_wheel)
+        self.tree.bind("<Button-4>", self.on_table_wheel)
+        self.tree.bind("<Button-5>", self.on_table_wheel)
+        self.tree.bind("<Configure>", lambda event: self.show_table_rows(self.table_top))
+        
+        # Row positions shown in the table, in display order
+        self.table_window = (0, 0)  # Range of table_rows currently materialized in the Treeview
+        self.table_top = 0  # Index in table_rows of the first visible row
+        self.set_table_rows(np.arange(len(self.df)))
+
+    def set_table_rows(self, rows):
+        """Show the given DataFrame row positions in the Table View, from the top."""
+        self.table_rows = np.asarray(rows, dtype=np.intp)
+        self.table_window = (0, 0)
+        self.show_table_rows(0)
+        logger.debug("Table View shows %s rows", len(self.table_rows))
+
+    def table_visible_count(self):
+        """Number of rows that fit in the Treeview (the header takes about one row)."""
+        return max(self.tree.winfo_height() // self.tree_row_height - 1, 1)
+
+    def show_table_rows(self, top):
+        """Scroll the Table View so table_rows[top] is the first visible row."""
+        visible = self.table_visible_count()
+        total = len(self.table_rows)
+        top = int(min(max(top, 0), max(total - visible, 0)))
+        self.table_top = top
+        
+        start, end = self.table_window
+        if not (start <= top and min(top + visible, total) <= end) or start == end:
+            # Refill the Treeview with the visible rows and a buffer on either side
+            start = max(top - TABLE_BUFFER_ROWS, 0)
+            end = min(top + visible + TABLE_BUFFER_ROWS, total)
+            self.tree.delete(*self.tree.get_children())
+            positions = self.table_rows[start:end]
+            for position, row in zip(positions.tolist(), self.df.iloc[positions].itertuples(index=False)):
+                self.tree.insert("", tk.END, values=list(row), iid=str(position))
+            self.table_window = (start, end)
+        
+        # Scroll inside the materialized window and mirror the position on the scrollbar
+        if end > start:
+            self.tree.yview_moveto((top - start) / (end - start))
+        if total:
+            self.table_vsb.set(top / total, min(top + visible, total) / total)
+        else:
+            self.table_vsb.set(0, 1)
+
+    def scroll_table(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", count, "units"/"pages")."""
+        if self.dropdown is not None:
+            self.on_dropdown_close(None)
+        if args[0] == "moveto":
+            self.show_table_rows(round(float(args[1]) * len(self.table_rows)))
+        elif args[0] == "scroll":
+            step = self.table_visible_count() if args[2] == "pages" else 1
+            self.show_table_rows(self.table_top + int(args[1]) * step)
+
+    def on_table_wheel(self, event):
+        """Scroll the Table View by three rows per wheel step."""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_table("scroll", -3, "units")
+        else:
+            self.scroll_table("scroll", 3, "units")
+        return "break"  # The Treeview must not scroll its own items
+
+    def on_filter_key(self, event):
+        """Run the table filter once typing pauses."""
+        if event.keysym == "Return":
+            return
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(SEARCH_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self):
+        """Show only the rows matching the filter query (all rows for an empty query)."""
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+            self.filter_job = None
+        query = self.filter_var.get().strip()
+        try:
+            rows = filter_rows(self.df, query) if query else np.arange(len(self.df))
+        except ValueError as e:
+            self.table_status_var.set(str(e))
+            return
+        self.set_table_rows(rows)
+        self.table_status_var.set(f"{len(rows)} shelves match" if query else "")
+
+    def refresh_table_row(self, row):
+        """Show the current values of row position `row` if it is materialized."""
+        if self.tree.exists(str(row)):
+            self.tree.item(str(row), values=list(self.df.iloc[row]))
 
     def create_shelf_tab(self):
         """Create the shelf view tab with 3D shelf visualization."""
         # Create main frame
         frame = ttk.Frame(self.shelf_tab, style="Custom.TFrame")
         frame.pack(padx=20, pady=20, fill="both", expand=True)
-        print("Created main frame for Shelf View tab")
+        logger.debug("Created main frame for Shelf View tab")
         
         # Create frame for dropdowns
         dropdown_frame = ttk.Frame(frame, style="Custom.TFrame")
         dropdown_frame.pack(fill="x", pady=10)
-        print("Created dropdown frame for Shelf View tab")
+        logger.debug("Created dropdown frame for Shelf View tab")
         
         # Populate dropdowns for Section, Aisle, Side
         self.sections = sorted(self.df['Section'].unique().tolist())
         self.aisles = sorted(self.df['Aisle'].unique().tolist())
         self.sides = sorted(self.df['Side'].unique().tolist())
-        print(f"Sections: {self.sections}")
-        print(f"Aisles: {self.aisles}")
-        print(f"Sides: {self.sides}")
+        logger.debug("Sections: %s", self.sections)
+        logger.debug("Aisles: %s", self.aisles)
+        logger.debug("Sides: %s", self.sides)
         
         # Section dropdown
         ttk.Label(dropdown_frame, text="Section:", font=self.large_font).grid(row=0, column=0, padx=5)
         self.section_var = tk.StringVar()
         self.section_dropdown = ttk.Combobox(dropdown_frame, textvariable=self.section_var, values=self.sections, state="readonly", style="TCombobox")
         self.section_dropdown.grid(row=0, column=1, padx=5)
-        self.section_dropdown.bind("<<ComboboxSelected>>", self.update_shelf_view)
-        print("Added Section dropdown")
+        self.section_dropdown.bind("<<ComboboxSelected>>", lambda event: self.request_redraw("filter"))
+        logger.debug("Added Section dropdown")
         
         # Aisle dropdown
         ttk.Label(dropdown_frame, text="Aisle:", font=self.large_font).grid(row=0, column=2, padx=5)
         self.aisle_var = tk.StringVar()
         self.aisle_dropdown = ttk.Combobox(dropdown_frame, textvariable=self.aisle_var, values=self.aisles, state="readonly", style="TCombobox")
         self.aisle_dropdown.grid(row=0, column=3, padx=5)
-        self.aisle_dropdown.bind("<<ComboboxSelected>>", self.update_shelf_view)
-        print("Added Aisle dropdown")
+        self.aisle_dropdown.bind("<<ComboboxSelected>>", lambda event: self.request_redraw("filter"))
+        logger.debug("Added Aisle dropdown")
         
         # Side dropdown
         ttk.Label(dropdown_frame, text="Side:", font=self.large_font).grid(row=0, column=4, padx=5)
         self.side_var = tk.StringVar()
         self.side_dropdown = ttk.Combobox(dropdown_frame, textvariable=self.side_var, values=self.sides, state="readonly", style="TCombobox")
         self.side_dropdown.grid(row=0, column=5, padx=5)
-        self.side_dropdown.bind("<<ComboboxSelected>>", self.update_shelf_view)
-        print("Added Side dropdown")
+        self.side_dropdown.bind("<<ComboboxSelected>>", lambda event: self.request_redraw("filter"))
+        logger.debug("Added Side dropdown")
         
         # Family dropdown
         ttk.Label(dropdown_frame, text="Family:", font=self.large_font).grid(row=0, column=6, padx=5)
@@ -259,66 +526,71 @@ class ShelfAssignmentApp:
         self.family_dropdown = ttk.Combobox(dropdown_frame, textvariable=self.family_var, values=self.families, state="readonly", style="TCombobox")
         self.family_dropdown.grid(row=0, column=7, padx=5)
         self.family_dropdown.bind("<<ComboboxSelected>>", self.update_category_dropdown)
-        print("Added Family dropdown")
+        logger.debug("Added Family dropdown")
         
         # Category dropdown
         ttk.Label(dropdown_frame, text="Category:", font=self.large_font).grid(row=0, column=8, padx=5)
         self.category_var = tk.StringVar()
         self.category_dropdown = ttk.Combobox(dropdown_frame, textvariable=self.category_var, state="readonly", style="TCombobox")
         self.category_dropdown.grid(row=0, column=9, padx=5)
-        print("Added Category dropdown")
+        logger.debug("Added Category dropdown")
         
         # Create Canvas for 3D shelf visualization
         self.canvas_frame = ttk.Frame(frame, style="Custom.TFrame")
         self.canvas_frame.pack(fill="both", expand=True)
-        print("Created canvas frame for Shelf View tab")
+        logger.debug("Created canvas frame for Shelf View tab")
         
         self.canvas = tk.Canvas(self.canvas_frame, bg="#ffffff")
         self.canvas.pack(fill="both", expand=True)
-        print("Created canvas for 3D shelf visualization")
+        logger.debug("Created canvas for 3D shelf visualization")
         
         # Bind mouse events for selection
         self.canvas.bind("<Button-1>", self.start_selection)
         self.canvas.bind("<B1-Motion>", self.update_selection)
         self.canvas.bind("<ButtonRelease-1>", self.end_selection)
-        print("Bound mouse events for selection on canvas")
+        logger.debug("Bound mouse events for selection on canvas")
+        
+        # Renders are scheduled with request_redraw; requests that arrive before the
+        # scheduled render runs are merged into it
+        self.redraw_job = None
+        self.redraw_reasons = set()
+        self.redraws_requested = 0
+        self.redraws_performed = 0
         
         # Bind resize event to redraw the shelf
         self.canvas.bind("<Configure>", self.on_resize)
-        print("Bound resize event to canvas")
+        logger.debug("Bound resize event to canvas")
         
         # Variables for selection
         self.start_x = None
         self.start_y = None
         self.selection_rect = None
         self.selected_cells = set()  # Store (level, shelf) coordinates of selected cells
+        self.selection_range = None  # (first shelf, last shelf, first level, last level) under the rectangle
+        
+        # Retained canvas items of the Shelf View, reused across redraws
+        self.cell_items = {}  # (level, shelf) -> canvas item ids of that cell
+        self.cell_content = {}  # (level, shelf) -> (label text, color) currently shown
+        self.label_layouts = {}  # (category, font size, width) -> wrapped label text
+        self.label_fonts = {}  # Font size -> tkinter Font used to measure labels
+        self.cell_coords = {}  # (level, shelf) -> front face rectangle
+        self.shelf_labels = {}
+        self.level_labels = {}
+        self.scene_shape = None  # (max_level, max_shelf) the items were created for
+        self.scene_geometry = None  # Sizes and offsets the items were laid out with
+        self.scene_bay = None  # (section, aisle, side) on display
         
         # Variables for shelf sizing
         self.initial_cell_width = None
         self.initial_cell_height = None
         self.initial_aspect_ratio = None
         self.scale_factor = 1.0  # Scaling factor based on window size
+        self.canvas_size = None  # (width, height) from the last <Configure>; None until the first one
         
         # Color mapping for categories (eye-friendly, high-contrast colors)
         self.category_colors = {}
-        self.color_list = [
-            "darkblue",    # Deep blue
-            "darkgreen",   # Forest green
-            "darkred",     # Deep red
-            "purple4",     # Dark purple
-            "darkorange",  # Muted orange
-            "saddlebrown", # Earthy brown
-            "deeppink4",   # Muted pink
-            "teal",        # Teal
-            "darkmagenta", # Dark magenta
-            "olive",       # Olive green
-            "navy",        # Navy blue
-            "coral4",      # Muted coral
-            "goldenrod",   # Muted gold
-            "darkviolet",  # Dark violet
-            "seagreen",    # Sea green
-            "indigo"       # Indigo
-        ]
+        self.color_list = PALETTE  # Shared with the planogram export
+        self.build_palette()
         
         # Create Apply and Clear Selection buttons
         button_frame = ttk.Frame(frame, style="Custom.TFrame")
@@ -326,11 +598,25 @@ class ShelfAssignmentApp:
         
         apply_button = ttk.Button(button_frame, text="Apply", command=self.apply_selection, style="TButton")
         apply_button.grid(row=0, column=0, padx=5)
-        print("Added Apply button to Shelf View tab")
+        logger.debug("Added Apply button to Shelf View tab")
         
         clear_button = ttk.Button(button_frame, text="Clear Selection", command=self.clear_selection, style="TButton")
         clear_button.grid(row=0, column=1, padx=5)
-        print("Added Clear Selection button to Shelf View tab")
+        logger.debug("Added Clear Selection button to Shelf View tab")
+        
+        # Result of the last apply, shown without interrupting the user
+        self.status_var = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.status_var, font=self.large_font, background="#e6ecf0").grid(row=0, column=4, padx=15)
+        
+        # Undo and Redo buttons, also on Ctrl+Z and Ctrl+Y
+        undo_button = ttk.Button(button_frame, text="Undo", command=self.undo_edit, style="TButton")
+        undo_button.grid(row=0, column=2, padx=5)
+        redo_button = ttk.Button(button_frame, text="Redo", command=self.redo_edit, style="TButton")
+        redo_button.grid(row=0, column=3, padx=5)
+        self.root.bind_all("<Control-z>", lambda event: self.undo_edit())
+        self.root.bind_all("<Control-y>", lambda event: self.redo_edit())
+        self.root.bind_all("<Control-Shift-Z>", lambda event: self.redo_edit())
+        logger.debug("Added Undo and Redo buttons to Shelf View tab")
         
         # Initialize the shelf view
         if self.sections:
@@ -339,15 +625,15 @@ class ShelfAssignmentApp:
             self.aisle_var.set(self.aisles[0])
         if self.sides:
             self.side_var.set(self.sides[0])
-        print("Initialized shelf view with default dropdown values")
-        self.update_shelf_view()
+        logger.debug("Initialized shelf view with default dropdown values")
+        self.request_redraw("data")
 
     def on_resize(self, event):
-        """Handle window resize by redrawing the shelf with adjusted sizes."""
+        """Handle window resize by scheduling a redraw of the shelf with adjusted sizes."""
         # Recalculate the scale factor based on the new canvas size
-        self.canvas.update_idletasks()
-        new_width = self.canvas.winfo_width()
-        new_height = self.canvas.winfo_height()
+        new_width = event.width
+        new_height = event.height
+        self.canvas_size = (new_width, new_height)
         
         # Initial canvas dimensions (approximated as before)
         initial_width = 1000
@@ -359,33 +645,63 @@ class ShelfAssignmentApp:
         
         # Use the smaller scale factor to maintain aspect ratio
         self.scale_factor = min(scale_width, scale_height)
-        print(f"Window resized: new width={new_width}, new height={new_height}, scale_factor={self.scale_factor}")
+        logger.debug("Window resized: new width=%s, new height=%s, scale_factor=%s", new_width, new_height, self.scale_factor)
         
         # Redraw the shelf with the new scale factor
+        self.request_redraw("resize")
+
+    def request_redraw(self, reason="data"):
+        """Schedule a Shelf View render for reason ("resize", "filter" or "data").
+
+        At most one render is pending at a time, so a burst of <Configure> events
+        while the window edge is dragged costs one render per frame interval.
+        """
+        self.redraws_requested += 1
+        self.redraw_reasons.add(reason)
+        if self.redraw_job is None:
+            self.redraw_job = self.root.after(REDRAW_INTERVAL_MS, self.perform_redraw)
+
+    def cancel_redraw(self):
+        """Drop a pending render, e.g. because a render is about to happen anyway."""
+        if self.redraw_job is not None:
+            self.root.after_cancel(self.redraw_job)
+            self.redraw_job = None
+        self.redraw_reasons.clear()
+
+    def perform_redraw(self):
+        """Run the scheduled render for every request merged into it."""
+        self.redraw_job = None
+        reasons = sorted(self.redraw_reasons)
         self.update_shelf_view()
+        logger.debug("Rendered shelf view for %s: %s renders for %s requests", reasons, self.redraws_performed, self.redraws_requested)
 
     def update_shelf_view(self, event=None):
-        """Update the 3D shelf visualization based on Section, Aisle, and Side selection."""
+        """Update the 3D shelf visualization based on Section, Aisle, and Side selection.
+
+        The canvas items of each cell are kept between calls: they are created when the
+        grid shape changes, moved when the geometry changes (resize) and relabelled only
+        for cells whose category text or colour changed.
+        """
+        # This render covers any that are still scheduled
+        self.cancel_redraw()
+        self.redraws_performed += 1
+        
         section = self.section_var.get()
         aisle = self.aisle_var.get()
         side = self.side_var.get()
         
         if not section or not aisle or not side:
-            print("No selection for Section, Aisle, or Side; skipping shelf view update")
+            logger.debug("No selection for Section, Aisle, or Side; skipping shelf view update")
             return
         
-        print(f"Updating shelf view for Section: {section}, Aisle: {aisle}, Side: {side}")
+        logger.debug("Updating shelf view for Section: %s, Aisle: %s, Side: %s", section, aisle, side)
         
-        # Filter the DataFrame for the selected Section, Aisle, and Side
-        filtered_df = self.df[
-            (self.df['Section'] == section) &
-            (self.df['Aisle'] == int(aisle)) &
-            (self.df['Side'] == int(side))
-        ]
+        # Rows of the selected Section, Aisle, and Side from the coordinate index
+        filtered_df = self.df.iloc[self.shelf_index.bay_rows(section, aisle, side)]
         
         if filtered_df.empty:
-            print("No data found for selected Section, Aisle, and Side; clearing canvas")
-            self.canvas.delete("all")
+            logger.debug("No data found for selected Section, Aisle, and Side; clearing canvas")
+            self.clear_scene()
             return
         
         # Determine the number of levels and shelves
@@ -393,33 +709,29 @@ class ShelfAssignmentApp:
         max_shelf = filtered_df['Shelf'].max()
         
         if not max_level or not max_shelf:
-            print("Max level or max shelf not found; clearing canvas")
-            self.canvas.delete("all")
+            logger.debug("Max level or max shelf not found; clearing canvas")
+            self.clear_scene()
             return
         
         self.max_level = int(max_level)
         self.max_shelf = int(max_shelf)
-        print(f"Max Level: {self.max_level}, Max Shelf: {self.max_shelf}")
+        logger.debug("Max Level: %s, Max Shelf: %s", self.max_level, self.max_shelf)
         
-        # Clear the canvas
-        self.canvas.delete("all")
-        self.selected_cells.clear()
-        print("Cleared canvas and selected cells")
+        # Switching bays drops the selection
+        bay = (section, int(aisle), int(side))
+        if bay != self.scene_bay:
+            self.clear_selection()
+            self.scene_bay = bay
         
         # Calculate base cell size (before scaling)
-        canvas_width_base = 1000  # Base width for initial calculation
-        canvas_height_base = 600  # Base height for initial calculation
-        cell_width_base = canvas_width_base // self.max_shelf
-        cell_height_base = canvas_height_base // self.max_level
-        self.cell_width_base = min(cell_width_base, 60)  # Base width of each shelf
-        self.cell_height_base = min(cell_height_base, 80)  # Base height of each shelf
+        self.cell_width_base, self.cell_height_base = base_cell_size(self.max_level, self.max_shelf)
         
         # Calculate the initial aspect ratio (only once)
         if self.initial_aspect_ratio is None:
             self.initial_cell_width = self.cell_width_base
             self.initial_cell_height = self.cell_height_base
             self.initial_aspect_ratio = self.initial_cell_width / self.initial_cell_height
-            print(f"Initial aspect ratio: {self.initial_aspect_ratio}")
+            logger.debug("Initial aspect ratio: %s", self.initial_aspect_ratio)
         
         # Apply the scale factor to maintain aspect ratio
         self.cell_width = self.cell_width_base * self.scale_factor
@@ -429,169 +741,358 @@ class ShelfAssignmentApp:
         current_aspect_ratio = self.cell_width / self.cell_height
         if abs(current_aspect_ratio - self.initial_aspect_ratio) > 0.01:  # Small tolerance for floating-point errors
             self.cell_height = self.cell_width / self.initial_aspect_ratio
-            print(f"Adjusted cell height to maintain aspect ratio: cell_width={self.cell_width}, cell_height={self.cell_height}")
+            logger.debug("Adjusted cell height to maintain aspect ratio: cell_width=%s, cell_height=%s", self.cell_width, self.cell_height)
         
         # Scale the depth and fonts
         self.depth = 10 * self.scale_factor  # Depth effect for 3D visualization
         shelf_font_size = int(self.shelf_text_font_base * self.scale_factor)
         label_font_size = int(self.label_font_base * self.scale_factor)
-        self.shelf_text_font = ('Helvetica', max(shelf_font_size, 6), 'bold')  # Bold text for better visibility
+        self.shelf_font_size = max(shelf_font_size, 6)
+        self.shelf_text_font = ('Helvetica', self.shelf_font_size, 'bold')  # Bold text for better visibility
         self.label_font = ('Helvetica', max(label_font_size, 6))
-        print(f"Scaled sizes: cell_width={self.cell_width}, cell_height={self.cell_height}, depth={self.depth}, shelf_font_size={shelf_font_size}, label_font_size={label_font_size}")
+        logger.debug("Scaled sizes: cell_width=%s, cell_height=%s, depth=%s, shelf_font_size=%s, label_font_size=%s", self.cell_width, self.cell_height, self.depth, shelf_font_size, label_font_size)
         
         # Calculate the total size of the shelf grid (including space for labels)
-        label_space_left = 50 * self.scale_factor  # Space for level labels on the left
-        label_space_top = 30 * self.scale_factor   # Space for shelf labels on the top
-        total_width = self.max_shelf * self.cell_width + self.depth + label_space_left
-        total_height = self.max_level * self.cell_height + self.depth + label_space_top
+        label_space_left = LABEL_SPACE_LEFT * self.scale_factor  # Space for level labels on the left
+        label_space_top = LABEL_SPACE_TOP * self.scale_factor   # Space for shelf labels on the top
+        total_width, total_height = grid_size(self.max_level, self.max_shelf, self.cell_width, self.cell_height, self.scale_factor)
         
         # Center the shelf grid in the canvas
-        self.canvas.update_idletasks()
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+        # Size from <Configure>; only a render before the first one asks Tk, which forces a layout pass
+        if self.canvas_size is None:
+            self.canvas.update_idletasks()
+            self.canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        canvas_width, canvas_height = self.canvas_size
         offset_x = (canvas_width - total_width) // 2 + label_space_left
         offset_y = (canvas_height - total_height) // 2 + label_space_top
-        print(f"Centering shelf grid: offset_x={offset_x}, offset_y={offset_y}")
+        logger.debug("Centering shelf grid: offset_x=%s, offset_y=%s", offset_x, offset_y)
+        
+        # Create the cell items only when the grid shape changes
+        if (self.max_level, self.max_shelf) != self.scene_shape:
+            self.build_scene()
+        
+        # Move the items only when the geometry changes
+        geometry = (self.cell_width, self.cell_height, self.depth, offset_x, offset_y, self.shelf_text_font, self.label_font)
+        if geometry != self.scene_geometry:
+            self.layout_scene(offset_x, offset_y)
+            self.scene_geometry = geometry
+        
+        self.refresh_cells(self.cell_items.keys())
+        logger.debug("Drew 3D shelf grid with %s levels and %s shelves", self.max_level, self.max_shelf)
+
+    def build_scene(self):
+        """Create the canvas items of a max_level x max_shelf grid, tagged per cell."""
+        self.canvas.delete("scene")
+        self.selected_cells.clear()
+        self.cell_items = {}
+        self.cell_content = {}
+        self.shelf_labels = {}
+        self.level_labels = {}
         
-        # Draw shelf labels (Shelf 1, Shelf 2, etc.) above the grid
+        # Shelf labels (S1, S2, ...) above the grid and level labels (L1, L2, ...) to its left
         for shelf in range(1, self.max_shelf + 1):
-            label_x = (shelf - 1) * self.cell_width + offset_x + self.cell_width / 2
-            label_y = offset_y - self.depth - 10 * self.scale_factor
-            self.canvas.create_text(
-                label_x, label_y,
-                text=f"S{shelf}",
-                font=self.label_font,
-                fill="black",
-                anchor="center"
+            self.shelf_labels[shelf] = self.canvas.create_text(
+                0, 0, text=f"S{shelf}", fill="black", anchor="center", tags=("scene",)
             )
-        
-        # Draw level labels (Level 1, Level 2, etc.) to the left of the grid
         for level in range(1, self.max_level + 1):
-            display_row = self.max_level - level
-            label_y = display_row * self.cell_height + offset_y + self.cell_height / 2
-            label_x = offset_x - self.depth - 30 * self.scale_factor
-            self.canvas.create_text(
-                label_x, label_y,
-                text=f"L{level}",
-                font=self.label_font,
-                fill="black",
-                anchor="center"
+            self.level_labels[level] = self.canvas.create_text(
+                0, 0, text=f"L{level}", fill="black", anchor="center", tags=("scene",)
             )
         
-        # Build category color mapping
-        unique_categories = filtered_df['Category'].dropna().unique()
-        self.category_colors.clear()
-        for idx, category in enumerate(unique_categories):
-            color = self.color_list[idx % len(self.color_list)]
-            self.category_colors[str(category)] = color
-        print(f"Category color mapping: {self.category_colors}")
-        
-        # Draw the 3D shelves with Level 1 at the top
-        self.cell_coords = {}  # Store coordinates for each (level, shelf)
+        # Front face, top edge and right edge of each shelf plus its category label
         for level in range(1, self.max_level + 1):
-            # Reverse the level ordering: Level 1 at the top, max_level at the bottom
-            display_row = self.max_level - level  # Level 1 -> row 0 (top), Level max_level -> row (max_level-1) (bottom)
             for shelf in range(1, self.max_shelf + 1):
-                # Base coordinates for the shelf (top-left corner of the shelf face)
-                x1 = (shelf - 1) * self.cell_width + offset_x
-                y1 = display_row * self.cell_height + offset_y
-                x2 = x1 + self.cell_width
-                y2 = y1 + self.cell_height
-                
-                # Adjust for 3D effect (top-left corner shifted for perspective)
-                x1_3d = x1 + self.depth
-                y1_3d = y1
-                x2_3d = x2 + self.depth
-                y2_3d = y2
-                
-                # Draw the front face of the shelf (trapezoid for perspective)
-                self.canvas.create_polygon(
-                    x1_3d, y1_3d,  # Top-left
-                    x2_3d, y1_3d,  # Top-right
-                    x2, y2,        # Bottom-right
-                    x1, y2,        # Bottom-left
-                    fill="#d3d3d3", outline="black"  # Light gray for the front face
-                )
-                
-                # Draw the top edge (for 3D effect)
-                self.canvas.create_polygon(
-                    x1_3d, y1_3d,  # Top-left of front face
-                    x2_3d, y1_3d,  # Top-right of front face
-                    x2_3d - self.depth, y1_3d - self.depth,  # Top-right shifted up
-                    x1_3d - self.depth, y1_3d - self.depth,  # Top-left shifted up
-                    fill="#f0f0f0", outline="black"  # Lighter gray for the top edge
-                )
-                
-                # Draw the right edge (for 3D effect)
-                self.canvas.create_polygon(
-                    x2_3d, y1_3d,  # Top-right of front face
-                    x2_3d - self.depth, y1_3d - self.depth,  # Top-right shifted up
-                    x2 - self.depth, y2 - self.depth,  # Bottom-right shifted up
-                    x2, y2,        # Bottom-right of front face
-                    fill="#c0c0c0", outline="black"  # Darker gray for the right edge
-                )
-                
-                # Store coordinates for selection (use the front face for selection purposes)
-                self.cell_coords[(level, shelf)] = (x1, y1, x2, y2)
-                
-                # Add text label with Category value if available
-                mask = (
-                    (self.df['Section'] == section) &
-                    (self.df['Aisle'] == int(aisle)) &
-                    (self.df['Side'] == int(side)) &
-                    (self.df['Level'] == level) &
-                    (self.df['Shelf'] == shelf)
-                )
-                row = self.df[mask]
-                if not row.empty:
-                    category = str(row.iloc[0]['Category'])
-                    if pd.isna(category) or category == "" or category == "nan":
-                        continue
-                    
-                    # Determine the text color based on the category
-                    text_color = self.category_colors.get(category, "black")
-                    
-                    # Split the category text into multiple lines if too long
-                    max_width = self.cell_width - 10  # Approximate available width
-                    font_size = max(shelf_font_size, 6)
-                    avg_char_width = font_size * 0.6  # Rough estimate of character width
-                    max_chars_per_line = int(max_width / avg_char_width)
-                    
-                    # Split the text into words
-                    words = category.split()
-                    lines = []
-                    current_line = []
-                    current_length = 0
-                    
-                    for word in words:
-                        word_length = len(word)
-                        if current_length + word_length + len(current_line) <= max_chars_per_line:
-                            current_line.append(word)
-                            current_length += word_length
-                        else:
-                            lines.append(" ".join(current_line))
-                            current_line = [word]
-                            current_length = word_length
-                    if current_line:
-                        lines.append(" ".join(current_line))
-                    
-                    # Draw each line of text
-                    num_lines = len(lines)
-                    line_spacing = font_size * 1.2  # Space between lines
-                    total_text_height = num_lines * line_spacing
-                    start_y = (y1 + y2) / 2 - total_text_height / 2 + line_spacing / 2
-                    
-                    for idx, line in enumerate(lines):
-                        text_x = (x1 + x2) / 2 + self.depth / 2
-                        text_y = start_y + idx * line_spacing
-                        self.canvas.create_text(
-                            text_x, text_y,
-                            text=line,
-                            font=self.shelf_text_font,
-                            fill=text_color,
-                            anchor="center"
-                        )
-        print(f"Drew 3D shelf grid with {self.max_level} levels and {self.max_shelf} shelves")
+                tags = ("scene", f"cell_{level}_{shelf}")
+                self.cell_items[(level, shelf)] = {
+                    'front': self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=FACE_COLORS['front'], outline="black", tags=tags),  # Light gray for the front face
+                    'top': self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=FACE_COLORS['top'], outline="black", tags=tags),  # Lighter gray for the top edge
+                    'right': self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=FACE_COLORS['right'], outline="black", tags=tags),  # Darker gray for the right edge
+                    'text': self.canvas.create_text(0, 0, text="", anchor="center", justify="center", tags=tags)
+                }
+        self.scene_shape = (self.max_level, self.max_shelf)
+        self.scene_geometry = None
+        logger.debug("Created canvas items for %s cells", len(self.cell_items))
+
+    def layout_scene(self, offset_x, offset_y):
+        """Move the retained items to the current cell size and offsets."""
+        for shelf, item in self.shelf_labels.items():
+            self.canvas.coords(item, *shelf_label_position(shelf, self.cell_width, offset_x, offset_y, self.scale_factor))
+            self.canvas.itemconfig(item, font=self.label_font)
+        for level, item in self.level_labels.items():
+            self.canvas.coords(item, *level_label_position(level, self.max_level, self.cell_height, offset_x, offset_y, self.scale_factor))
+            self.canvas.itemconfig(item, font=self.label_font)
+        
+        # Level 1 at the top, max_level at the bottom
+        self.grid_origin = (offset_x, offset_y)  # Top-left corner of the front faces, for hit-testing
+        self.cell_coords = {}  # Store coordinates for each (level, shelf)
+        for (level, shelf), items in self.cell_items.items():
+            # Base coordinates for the shelf (top-left corner of the shelf face)
+            x1, y1, x2, y2 = cell_rect(level, shelf, self.max_level, self.cell_width, self.cell_height, offset_x, offset_y)
+            
+            # Front face (trapezoid for perspective), top edge and right edge
+            for face, points in cell_faces(x1, y1, x2, y2, self.depth).items():
+                self.canvas.coords(items[face], *points)
+            self.canvas.coords(items['text'], *text_position(x1, y1, x2, y2, self.depth))
+            self.canvas.itemconfig(items['text'], font=self.shelf_text_font)
+            
+            # Store coordinates for selection (use the front face for selection purposes)
+            self.cell_coords[(level, shelf)] = (x1, y1, x2, y2)
+
+    def refresh_cells(self, cells):
+        """Relabel the given (level, shelf) cells whose category text or colour changed."""
+        if self.scene_bay is None:
+            return
+        bay_cells = self.shelf_index.bay_cells(*self.scene_bay)
+        category_col = self.df.columns.get_loc('Category')
+        for cell in cells:
+            items = self.cell_items.get(cell)
+            if items is None:
+                continue
+            row_pos = bay_cells.get(cell)
+            category = self.df.iat[row_pos, category_col] if row_pos is not None else ""
+            category = "" if pd.isna(category) or str(category) == "nan" else str(category)
+            
+            # Categories added after the palette was built get the next color in the list
+            if category and category not in self.category_colors:
+                self.category_colors[category] = self.color_list[len(self.category_colors) % len(self.color_list)]
+            content = (self.wrap_category(category), self.category_colors.get(category, "black"))
+            if self.cell_content.get(cell) == content:
+                continue
+            self.cell_content[cell] = content
+            self.canvas.itemconfig(items['text'], text=content[0], fill=content[1])
+
+    def wrap_category(self, category, cell_width=None, font_size=None):
+        """Split a category into lines that fit a cell (the Shelf View's by default), measured in the label font.
+
+        Layouts are cached by (category, font size, width), so redraws, bay switches
+        and resizing back to an earlier size reuse them.
+        """
+        if not category:
+            return ""
+        cell_width = self.cell_width if cell_width is None else cell_width
+        font_size = self.shelf_font_size if font_size is None else font_size
+        max_width = int(cell_width) - TEXT_PADDING  # Available width inside the front face
+        key = (category, font_size, max_width)
+        text = self.label_layouts.get(key)
+        if text is None:
+            if len(self.label_layouts) >= LABEL_CACHE_SIZE:
+                self.label_layouts.clear()
+            lines = wrap_label(category, max_width, self.get_label_font(font_size).measure)
+            text = self.label_layouts[key] = "\n".join(lines)
+        return text
+
+    def get_label_font(self, size):
+        """Font matching shelf_text_font at the given size, for measuring labels."""
+        if size not in self.label_fonts:
+            self.label_fonts[size] = tkfont.Font(root=self.root, family='Helvetica', size=size, weight='bold')
+        return self.label_fonts[size]
+
+    def build_palette(self):
+        """Give every category of the store and catalog a color, kept for the whole session.
+
+        Colors follow the catalog's order (see store_palette), so a category keeps its
+        color across bays, redraws, resizes, saves and sessions.
+        """
+        self.category_colors = store_palette(self.df['Category'].cat.categories, self.categories)
+        logger.debug("Category color mapping built for %s categories", len(self.category_colors))
+
+    def clear_scene(self):
+        """Remove every shelf item from the canvas."""
+        self.canvas.delete("scene")
+        self.selected_cells.clear()
+        self.cell_items = {}
+        self.cell_content = {}
+        self.cell_coords = {}
+        self.scene_shape = None
+        self.scene_geometry = None
+        self.scene_bay = None
+
+    def create_overview_tab(self):
+        """Create the store overview tab: every bay of the store on one zoomable, pannable map."""
+        frame = ttk.Frame(self.overview_tab, style="Custom.TFrame")
+        frame.pack(padx=20, pady=20, fill="both", expand=True)
+        ttk.Label(frame, text="Drag to pan, scroll to zoom, double-click a bay to open it in the Shelf View",
+                  font=self.large_font, background="#e6ecf0").pack(pady=(0, 10))
+        self.overview_canvas = tk.Canvas(frame, bg="#ffffff")
+        self.overview_canvas.pack(fill="both", expand=True)
+        
+        self.overview_canvas.bind("<ButtonPress-1>", self.start_overview_pan)
+        self.overview_canvas.bind("<B1-Motion>", self.pan_overview)
+        self.overview_canvas.bind("<Double-Button-1>", self.open_overview_bay)
+        self.overview_canvas.bind("<MouseWheel>", self.zoom_overview)
+        self.overview_canvas.bind("<Button-4>", self.zoom_overview)
+        self.overview_canvas.bind("<Button-5>", self.zoom_overview)
+        self.overview_canvas.bind("<Configure>", lambda event: self.request_overview())
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        
+        self.overview_bays = None  # bay_summary() plus world coordinates x, y, w, h of each bay
+        self.overview_zoom = None  # Pixels per world unit; None until fitted to the canvas
+        self.overview_offset = (0.0, 0.0)  # Screen position of the world origin
+        self.overview_job = None
+        self.pan_start = None
+        logger.debug("Created Store Overview tab")
+
+    def on_tab_changed(self, event=None):
+        """Refresh the overview from the current table whenever its tab is shown."""
+        if self.notebook.select() == str(self.overview_tab):
+            self.overview_bays = None
+            self.request_overview()
+
+    def layout_overview(self):
+        """Place every bay on the world map: one band per Section, bays side by side in store order."""
+        bays = bay_summary(self.df, self.shelf_index)
+        bays['w'] = bays['Shelves'].astype(float)
+        bays['h'] = bays['Levels'] * OVERVIEW_LEVEL_HEIGHT
+        x = np.zeros(len(bays))
+        y = np.zeros(len(bays))
+        top = 0.0
+        for _, positions in bays.groupby('Section', sort=False).indices.items():
+            widths = bays['w'].to_numpy()[positions] + OVERVIEW_BAY_GAP
+            x[positions] = np.concatenate([[0.0], np.cumsum(widths)[:-1]])
+            y[positions] = top + bays['h'].to_numpy()[positions].max() - bays['h'].to_numpy()[positions]
+            top += bays['h'].to_numpy()[positions].max() + OVERVIEW_SECTION_GAP
+        bays['x'] = x
+        bays['y'] = y
+        self.overview_bays = bays
+        logger.debug("Laid out %s bays for the store overview", len(bays))
+
+    def request_overview(self, delay=None):
+        """Schedule an overview render; requests before it runs are merged into it.
+
+        With a delay, a pending render is pushed back instead, so it only runs once
+        the requests stop for that long.
+        """
+        if delay is not None and self.overview_job is not None:
+            self.root.after_cancel(self.overview_job)
+            self.overview_job = None
+        if self.overview_job is None:
+            self.overview_job = self.root.after(delay or REDRAW_INTERVAL_MS, self.render_overview)
+
+    def render_overview(self):
+        """Draw the part of the store inside the overview canvas, with detail depending on the zoom."""
+        self.overview_job = None
+        canvas = self.overview_canvas
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+        if self.overview_bays is None:
+            self.layout_overview()
+        bays = self.overview_bays
+        canvas.delete("all")
+        if bays.empty:
+            return
+        
+        # Fit the whole store to the canvas the first time
+        if self.overview_zoom is None:
+            world_w = (bays['x'] + bays['w']).max()
+            world_h = (bays['y'] + bays['h']).max()
+            self.overview_zoom = min(width / world_w, height / world_h) * 0.95
+            self.overview_offset = ((width - world_w * self.overview_zoom) / 2, (height - world_h * self.overview_zoom) / 2)
+        zoom = self.overview_zoom
+        offset_x, offset_y = self.overview_offset
+        
+        # Only bays overlapping the canvas are drawn
+        x1 = bays['x'].to_numpy() * zoom + offset_x
+        y1 = bays['y'].to_numpy() * zoom + offset_y
+        x2 = x1 + bays['w'].to_numpy() * zoom
+        y2 = y1 + bays['h'].to_numpy() * zoom
+        visible = np.flatnonzero((x2 >= 0) & (x1 <= width) & (y2 >= 0) & (y1 <= height))
+        
+        categories = self.df['Category'].cat.categories
+        colors = [self.category_colors.get(str(category), "black") for category in categories]
+        drawn = 0
+        if zoom < OVERVIEW_CELL_PX:
+            # Level of detail 1: one block per bay in the color of its most common category
+            outline = "gray40" if zoom >= 3 else ""
+            dominant = bays['Dominant'].to_numpy()
+            mostly_assigned = bays['Assigned'].to_numpy() >= 0.5
+            for pos in visible.tolist():
+                fill = colors[dominant[pos]] if mostly_assigned[pos] else "#d3d3d3"
+                canvas.create_rectangle(x1[pos], y1[pos], x2[pos], y2[pos], fill=fill, outline=outline)
+            drawn = len(visible)
+        else:
+            codes = self.df['Category'].cat.codes.to_numpy()
+            for pos in visible.tolist():
+                drawn += self.draw_overview_bay(bays.iloc[pos], x1[pos], y1[pos], codes, colors, categories, width, height)
+        logger.debug("Rendered overview at zoom %.2f: %s of %s bays, %s items", zoom, len(visible), len(bays), drawn)
+
+    def draw_overview_bay(self, bay, bay_x, bay_y, codes, colors, categories, width, height):
+        """Draw the visible shelves of one bay; returns the number of shelves drawn."""
+        canvas = self.overview_canvas
+        zoom = self.overview_zoom
+        cell_w = zoom
+        cell_h = zoom * OVERVIEW_LEVEL_HEIGHT
+        rows = self.shelf_index.bay_rows(bay['Section'], bay['Aisle'], bay['Side'])
+        x1 = bay_x + (self.shelf_index.shelves[rows] - 1) * cell_w
+        y1 = bay_y + (bay['Levels'] - self.shelf_index.levels[rows]) * cell_h  # Level 1 at the top
+        shown = np.flatnonzero((x1 + cell_w >= 0) & (x1 <= width) & (y1 + cell_h >= 0) & (y1 <= height))
+        
+        caption_size = max(min(int(zoom / 4), 14), 8)
+        canvas.create_text(bay_x, bay_y - 4, text=f"{bay['Section']}  Aisle {bay['Aisle']}  Side {bay['Side']}",
+                           anchor="sw", font=('Helvetica', caption_size, 'bold'))
+        if zoom < OVERVIEW_LABEL_PX:
+            # Level of detail 2: one flat block per shelf
+            for idx in shown.tolist():
+                code = codes[rows[idx]]
+                canvas.create_rectangle(x1[idx], y1[idx], x1[idx] + cell_w, y1[idx] + cell_h,
+                                        fill=colors[code] if code >= 0 else "#d3d3d3", outline="gray40")
+            return len(shown)
+        
+        # Level of detail 3: the Shelf View's 3D shelves with their category labels
+        depth = cell_w / 6
+        font_size = max(int(self.shelf_text_font_base * zoom / 60), 6)
+        for idx in shown.tolist():
+            sx1, sy1 = x1[idx], y1[idx]
+            sx2, sy2 = sx1 + cell_w, sy1 + cell_h
+            for face, points in cell_faces(sx1, sy1, sx2, sy2, depth).items():
+                canvas.create_polygon(*points, fill=FACE_COLORS[face], outline="black")
+            code = codes[rows[idx]]
+            if code >= 0:
+                category = str(categories[code])
+                canvas.create_text(*text_position(sx1, sy1, sx2, sy2, depth), text=self.wrap_category(category, cell_w, font_size),
+                                   fill=colors[code], font=('Helvetica', font_size, 'bold'), justify="center")
+        return len(shown)
+
+    def start_overview_pan(self, event):
+        self.pan_start = (event.x, event.y)
+
+    def pan_overview(self, event):
+        """Move what is drawn right away, and render the newly exposed parts once per frame."""
+        if self.pan_start is None or self.overview_zoom is None:
+            return
+        dx, dy = event.x - self.pan_start[0], event.y - self.pan_start[1]
+        self.pan_start = (event.x, event.y)
+        self.overview_canvas.move("all", dx, dy)
+        self.overview_offset = (self.overview_offset[0] + dx, self.overview_offset[1] + dy)
+        self.request_overview(OVERVIEW_PAN_SETTLE_MS)
+
+    def zoom_overview(self, event):
+        """Zoom in or out around the mouse pointer."""
+        if self.overview_zoom is None:
+            return
+        factor = OVERVIEW_ZOOM_STEP if (event.num == 4 or event.delta > 0) else 1 / OVERVIEW_ZOOM_STEP
+        offset_x, offset_y = self.overview_offset
+        self.overview_offset = (event.x - (event.x - offset_x) * factor, event.y - (event.y - offset_y) * factor)
+        self.overview_zoom *= factor
+        self.request_overview()
+
+    def open_overview_bay(self, event):
+        """Show the bay under the pointer in the Shelf View."""
+        if self.overview_bays is None or self.overview_zoom is None:
+            return
+        bays = self.overview_bays
+        world_x = (event.x - self.overview_offset[0]) / self.overview_zoom
+        world_y = (event.y - self.overview_offset[1]) / self.overview_zoom
+        hit = np.flatnonzero((bays['x'] <= world_x) & (world_x <= bays['x'] + bays['w']) &
+                             (bays['y'] <= world_y) & (world_y <= bays['y'] + bays['h']))
+        if not len(hit):
+            return
+        bay = bays.iloc[hit[0]]
+        self.section_var.set(bay['Section'])
+        self.aisle_var.set(bay['Aisle'])
+        self.side_var.set(bay['Side'])
+        self.notebook.select(self.shelf_tab)
+        self.request_redraw("filter")
 
     def start_selection(self, event):
         """Start the selection process on mouse click."""
@@ -601,7 +1102,10 @@ class ShelfAssignmentApp:
             self.start_x, self.start_y, self.start_x, self.start_y,
             outline="blue", dash=(2, 2)
         )
-        print(f"Started selection at ({self.start_x}, {self.start_y})")
+        # A selection left over from a drag that was not applied; the new one starts empty
+        self.clear_selection()
+        self.selection_range = None
+        logger.debug("Started selection at (%s, %s)", self.start_x, self.start_y)
 
     def update_selection(self, event):
         """Update the selection rectangle while dragging."""
@@ -609,25 +1113,47 @@ class ShelfAssignmentApp:
         current_y = self.canvas.canvasy(event.y)
         self.canvas.coords(self.selection_rect, self.start_x, self.start_y, current_x, current_y)
         
-        # Highlight cells within the selection
-        self.selected_cells.clear()
-        for (level, shelf), (x1, y1, x2, y2) in self.cell_coords.items():
-            # Check if the cell overlaps with the selection rectangle
-            sel_x1, sel_y1, sel_x2, sel_y2 = self.canvas.coords(self.selection_rect)
-            if (min(sel_x1, sel_x2) <= x2 and max(sel_x1, sel_x2) >= x1 and
-                min(sel_y1, sel_y2) <= y2 and max(sel_y1, sel_y2) >= y1):
-                self.selected_cells.add((level, shelf))
-                # Highlight the front face of the shelf
-                self.canvas.itemconfig(
-                    self.canvas.find_enclosed(x1, y1, x2, y2),
-                    fill="lightblue"
-                )
-            else:
-                self.canvas.itemconfig(
-                    self.canvas.find_enclosed(x1, y1, x2, y2),
-                    fill="#d3d3d3"  # Reset to default front face color
-                )
-        print(f"Updated selection: {len(self.selected_cells)} cells selected")
+        # Map the rectangle to the shelves and levels it overlaps
+        cell_range = self.cells_in_rect(self.start_x, self.start_y, current_x, current_y)
+        if cell_range == self.selection_range:
+            return
+        old_range = self.selection_range
+        self.selection_range = cell_range
+        
+        # Recolour only the row and column strips leaving or entering the rectangle
+        for cell in range_difference(old_range, cell_range):
+            self.selected_cells.discard(cell)
+            self.canvas.itemconfig(
+                self.cell_items[cell]['front'],
+                fill=FACE_COLORS['front']  # Reset to default front face color
+            )
+        for cell in range_difference(cell_range, old_range):
+            self.selected_cells.add(cell)
+            # Highlight the front face of the shelf
+            self.canvas.itemconfig(self.cell_items[cell]['front'], fill="lightblue")
+
+    def cells_in_rect(self, x1, y1, x2, y2):
+        """Return (first shelf, last shelf, first level, last level) overlapped by a rectangle, or None.
+
+        The front faces form a regular grid, so the range follows from the grid origin
+        and cell size without visiting any cell.
+        """
+        if not self.cell_items:
+            return None
+        offset_x, offset_y = self.grid_origin
+        left, right = sorted((x1, x2))
+        top, bottom = sorted((y1, y2))
+        
+        # Grid columns/rows (0-based) whose closed extent touches the rectangle
+        first_col = max(math.ceil((left - offset_x) / self.cell_width) - 1, 0)
+        last_col = min(math.floor((right - offset_x) / self.cell_width), self.max_shelf - 1)
+        first_row = max(math.ceil((top - offset_y) / self.cell_height) - 1, 0)
+        last_row = min(math.floor((bottom - offset_y) / self.cell_height), self.max_level - 1)
+        if first_col > last_col or first_row > last_row:
+            return None
+        
+        # Rows are drawn with Level 1 at the top
+        return (first_col + 1, last_col + 1, self.max_level - last_row, self.max_level - first_row)
 
     def end_selection(self, event):
         """End the selection process on mouse release and apply the selection."""
@@ -635,7 +1161,7 @@ class ShelfAssignmentApp:
         self.selection_rect = None
         self.start_x = None
         self.start_y = None
-        print(f"Ended selection with {len(self.selected_cells)} cells selected")
+        logger.debug("Ended selection with %s cells selected", len(self.selected_cells))
         
         # Automatically apply the selection
         if self.selected_cells:
@@ -643,13 +1169,14 @@ class ShelfAssignmentApp:
 
     def clear_selection(self):
         """Clear the current selection and reset highlights."""
+        for cell in self.selected_cells:
+            if cell in self.cell_items:
+                self.canvas.itemconfig(
+                    self.cell_items[cell]['front'],
+                    fill=FACE_COLORS['front']  # Reset to default front face color
+                )
         self.selected_cells.clear()
-        for (level, shelf), (x1, y1, x2, y2) in self.cell_coords.items():
-            self.canvas.itemconfig(
-                self.canvas.find_enclosed(x1, y1, x2, y2),
-                fill="#d3d3d3"  # Reset to default front face color
-            )
-        print("Cleared selection")
+        logger.debug("Cleared selection")
 
     def update_category_dropdown(self, event=None):
         """Update the Category dropdown based on the selected Family."""
@@ -660,7 +1187,7 @@ class ShelfAssignmentApp:
         else:
             self.category_dropdown['values'] = ["No Categories Available"]
             self.category_var.set("No Categories Available")
-        print(f"Updated Category dropdown for Family '{family}': {self.category_dropdown['values']}")
+        logger.debug("Updated Category dropdown for Family '%s': %s", family, self.category_dropdown['values'])
 
     def apply_selection(self):
         """Apply the selected Family and Category to the selected shelves in the Table View."""
@@ -672,44 +1199,69 @@ class ShelfAssignmentApp:
         
         if not section or not aisle or not side or not family or not category:
             messagebox.showwarning("Warning", "Please select all dropdown values.")
-            print("Apply failed: Missing dropdown values")
+            logger.info("Apply failed: Missing dropdown values")
             return
         
         if not self.selected_cells:
             messagebox.showwarning("Warning", "Please select at least one shelf in the grid.")
-            print("Apply failed: No cells selected")
+            logger.info("Apply failed: No cells selected")
             return
         
-        # Update the DataFrame and Treeview
-        updated_rows = 0
-        for level, shelf in self.selected_cells:
-            # Find the corresponding row in the DataFrame
-            mask = (
-                (self.df['Section'] == section) &
-                (self.df['Aisle'] == int(aisle)) &
-                (self.df['Side'] == int(side)) &
-                (self.df['Level'] == level) &
-                (self.df['Shelf'] == shelf)
-            )
-            row_idx = self.df.index[mask]
-            if not row_idx.empty:
-                row_idx = row_idx[0]
-                # Update the DataFrame
-                self.df.at[row_idx, 'Family'] = family
-                self.df.at[row_idx, 'Category'] = category
-                # Update the Treeview
-                values = list(self.df.iloc[row_idx])
-                self.tree.item(str(row_idx), values=values)
-                updated_rows += 1
-        messagebox.showinfo("Success", f"Family and Category values applied to {updated_rows} selected shelves.")
-        print(f"Applied Family: {family}, Category: {category} to {updated_rows} shelves")
-        
-        # Refresh the shelf view to update the text labels
-        self.update_shelf_view()
+        # Update the DataFrame in one assignment, then only the affected Treeview rows
+        rows = self.shelf_index.positions(section, aisle, side, self.selected_cells)
+        before = self.history.capture(self.df, rows)
+        bulk_assign(self.df, rows, family, category)
+        self.history.record(self.df, before)
+        self.journal.append(rows, family, category)
+        self.dirty_rows.update(rows.tolist())
+        for row_idx in rows.tolist():
+            self.refresh_table_row(row_idx)
+        updated_rows = len(rows)
+        self.status_var.set(f"Applied {family} / {category} to {updated_rows} shelves")
+        logger.info("Applied Family: %s, Category: %s to %s shelves", family, category, updated_rows)
+        
+        # Relabel only the applied cells and drop the selection highlight
+        applied_cells = list(self.selected_cells)
+        self.clear_selection()
+        self.refresh_cells(applied_cells)
+
+    def undo_edit(self):
+        """Revert the last apply or Table View edit."""
+        rows = self.history.undo(self.df)
+        if rows is None:
+            self.status_var.set("Nothing to undo")
+            return
+        self.edited_rows(rows)
+        self.status_var.set(f"Undid edit of {len(rows)} shelves")
+        logger.info("Undid edit of %s shelves", len(rows))
+
+    def redo_edit(self):
+        """Re-apply the last undone edit."""
+        rows = self.history.redo(self.df)
+        if rows is None:
+            self.status_var.set("Nothing to redo")
+            return
+        self.edited_rows(rows)
+        self.status_var.set(f"Redid edit of {len(rows)} shelves")
+        logger.info("Redid edit of %s shelves", len(rows))
+
+    def edited_rows(self, rows):
+        """Journal rows changed by undo/redo and show them in the Table View and Shelf View."""
+        self.journal.append_rows(self.df, rows)
+        self.dirty_rows.update(rows.tolist())
+        for row_idx in rows.tolist():
+            self.refresh_table_row(row_idx)
+        
+        # Relabel the cells of these rows that lie in the bay on display
+        if self.scene_bay is not None:
+            section, aisle, side = self.scene_bay
+            edited = self.df.iloc[rows]
+            in_bay = ((edited['Section'].astype(str) == section) & (edited['Aisle'] == aisle) & (edited['Side'] == side)).to_numpy()
+            self.refresh_cells(zip(edited['Level'].to_numpy()[in_bay].tolist(), edited['Shelf'].to_numpy()[in_bay].tolist()))
 
     def on_single_click(self, event):
         """Handle single-click to edit Family or Category cells in the Table View."""
-        print("Single-click event triggered")
+        logger.debug("Single-click event triggered")
         
         # Remove any existing dropdown
         if self.dropdown is not None:
@@ -718,29 +1270,35 @@ class ShelfAssignmentApp:
         
         # Identify the cell clicked
         region = self.tree.identify("region", event.x, event.y)
-        print(f"Region identified: {region}")
+        logger.debug("Region identified: %s", region)
         if region != "cell":
-            print("Not a cell region, exiting")
+            logger.debug("Not a cell region, exiting")
             return
         
         row_id = self.tree.identify_row(event.y)
         column_id = self.tree.identify_column(event.x)
-        print(f"Row ID: {row_id}, Column ID: {column_id}")
+        logger.debug("Row ID: %s, Column ID: %s", row_id, column_id)
         
         column_idx = int(column_id.replace("#", "")) - 1
         column_name = self.df.columns[column_idx]
-        print(f"Column name: {column_name}")
+        logger.debug("Column name: %s", column_name)
         
         # Only allow editing for Family and Category columns
         if column_name not in ["Family", "Category"]:
-            print(f"Column {column_name} is not editable (Family or Category required)")
+            logger.debug("Column %s is not editable (Family or Category required)", column_name)
+            return
+        
+        # The dropdown lists and the Shelf View an edit updates are not there until both loads finish
+        if not self.editing_ready:
+            logger.debug("Edit ignored, still loading")
+            self.table_status_var.set(LOADING_EDIT_MESSAGE)
             return
         
         # Get the bounding box of the cell
         bbox = self.tree.bbox(row_id, column_id)
-        print(f"Bounding box: {bbox}")
+        logger.debug("Bounding box: %s", bbox)
         if not bbox:
-            print("Bounding box is empty, cannot place dropdown")
+            logger.debug("Bounding box is empty, cannot place dropdown")
             return
         
         x, y, width, height = bbox
@@ -761,6 +1319,7 @@ class ShelfAssignmentApp:
         if column_name == "Family":
             self.full_values = self.families  # Store the full list for filtering
             self.dropdown["values"] = self.families
+            self.dropdown_search = self.get_search_index(("family",), self.families)
             current_value = str(self.df.at[int(row_id), "Family"])
             if pd.isna(current_value) or current_value == "nan":
                 current_value = ""
@@ -768,7 +1327,7 @@ class ShelfAssignmentApp:
                 self.dropdown.set(current_value)
             else:
                 self.dropdown.set("")
-            print(f"Family dropdown created with values: {self.families}, current: {current_value}")
+            logger.debug("Family dropdown created with values: %s, current: %s", self.families, current_value)
         else:  # Category
             # Get the selected family in this row
             family = str(self.df.at[int(row_id), "Family"])
@@ -780,6 +1339,7 @@ class ShelfAssignmentApp:
             else:
                 self.full_values = ["No Categories Available"]
                 self.dropdown["values"] = ["No Categories Available"]
+            self.dropdown_search = self.get_search_index(("category", family), self.full_values)
             current_value = str(self.df.at[int(row_id), "Category"])
             if pd.isna(current_value) or current_value == "nan":
                 current_value = ""
@@ -787,7 +1347,7 @@ class ShelfAssignmentApp:
                 self.dropdown.set(current_value)
             else:
                 self.dropdown.set("")
-            print(f"Category dropdown created for family '{family}' with values: {self.dropdown['values']}, current: {current_value}")
+            logger.debug("Category dropdown created for family '%s' with values: %s, current: %s", family, self.dropdown['values'], current_value)
         
         # Position the dropdown with adjusted width to ensure down arrow is visible
         self.dropdown.place(x=x, y=y, width=adjusted_width, height=height)
@@ -800,51 +1360,74 @@ class ShelfAssignmentApp:
         self.dropdown.bind("<FocusOut>", self.on_dropdown_close)
         self.dropdown.bind("<Return>", self.on_dropdown_select)  # Allow Enter key to select
 
+    def get_search_index(self, key, values):
+        """Type-ahead index of a dropdown list, built the first time the list is edited.
+
+        key names the list: ("family",) or ("category", family). The index is rebuilt
+        if the list's values have changed since, e.g. once the families have loaded.
+        """
+        values = tuple(values)
+        cached = self.search_indexes.get(key)
+        if cached is None or cached[0] != values:
+            cached = self.search_indexes[key] = (values, SearchIndex(values))
+        return cached[1]
+
     def on_key_release(self, event):
-        """Filter the combobox values based on the typed text and ensure dropdown pops up."""
+        """Filter the combobox values based on the typed text and show the list once typing pauses."""
         # Ignore arrow keys and Enter to allow navigation
         if event.keysym in ["Up", "Down", "Return"]:
-            print(f"Arrow key or Enter pressed: {event.keysym}, skipping filter")
+            logger.debug("Arrow key or Enter pressed: %s, skipping filter", event.keysym)
             return
         
-        typed_text = self.dropdown.get().strip().lower()
-        print(f"Key released, typed text: {typed_text}")
+        typed_text = self.dropdown.get()
+        logger.debug("Key released, typed text: %s", typed_text)
         
-        if typed_text == "":
-            # If the text is cleared, show the full list
-            self.dropdown["values"] = self.full_values
-            print(f"Restored full values: {self.full_values}")
-        else:
-            # Filter the values to those starting with the typed text (case-insensitive)
-            filtered_values = [val for val in self.full_values if val.lower().startswith(typed_text)]
-            self.dropdown["values"] = filtered_values
-            print(f"Filtered values: {filtered_values}")
+        # Prefix matches first, then substring matches, then close (typo-tolerant) matches
+        filtered_values = self.dropdown_search.search(typed_text)
+        if list(self.dropdown["values"]) == filtered_values:
+            return
+        self.dropdown["values"] = filtered_values
+        logger.debug("Filtered values: %s", filtered_values)
         
-        # Ensure the dropdown pops up after filtering
-        self.root.after(100, lambda: self.dropdown.event_generate('<Down>'))
-        self.dropdown.focus_set()  # Ensure the combobox retains focus
+        # Pop the list up again after a pause in typing, not after every key
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY_MS, self.post_dropdown)
+
+    def post_dropdown(self):
+        """Show the filtered list of the editing dropdown."""
+        self.search_job = None
+        if self.dropdown is not None:
+            self.dropdown.event_generate('<Down>')
+            self.dropdown.focus_set()  # Ensure the combobox retains focus
 
     def on_dropdown_select(self, event=None):
         """Update the data when a dropdown selection is made or Enter is pressed."""
-        print("Dropdown selection made")
+        logger.debug("Dropdown selection made")
         if self.current_edit is None:
-            print("No current edit, exiting")
+            logger.debug("No current edit, exiting")
             return
         row_id, column_idx, column_name = self.current_edit
         selected_value = self.dropdown.get()
-        print(f"Selected value: {selected_value} for {column_name} in row {row_id}")
+        logger.debug("Selected value: %s for %s in row %s", selected_value, column_name, row_id)
         
         # Update the DataFrame
-        self.df.at[int(row_id), column_name] = selected_value
+        before = self.history.capture(self.df, [int(row_id)])
+        set_cell(self.df, int(row_id), column_name, selected_value)
+        self.dirty_rows.add(int(row_id))
         
         # If the Family value changed, reset the Category value in the same row
         if column_name == "Family":
-            print(f"Family changed, resetting Category for row {row_id}")
-            self.df.at[int(row_id), "Category"] = ""  # Reset Category to empty
+            logger.debug("Family changed, resetting Category for row %s", row_id)
+            set_cell(self.df, int(row_id), "Category", None)  # Reset Category to empty
+        self.history.record(self.df, before)
+        self.journal.append_rows(self.df, [int(row_id)])
             
         # Update the Treeview display
-        values = list(self.df.iloc[int(row_id)])
-        self.tree.item(row_id, values=values)
+        self.refresh_table_row(int(row_id))
+        
+        # Show the edit in the Shelf View
+        self.request_redraw("data")
         
         # Update the Family and Category dropdowns in the Shelf View tab
         if column_name == "Family":
@@ -860,29 +1443,149 @@ class ShelfAssignmentApp:
 
     def on_dropdown_close(self, event):
         """Clean up the dropdown when it loses focus."""
-        print("Dropdown lost focus, closing")
+        logger.debug("Dropdown lost focus, closing")
         if self.dropdown is not None:
             self.dropdown.destroy()
             self.dropdown = None
             self.current_edit = None
 
     def save_data(self):
-        """Save the updated data back to the Excel file."""
+        """Save the edited rows to the working store in the background."""
+        if self.start_compaction() is None:
+            if self.compaction is not None and self.compaction.is_alive():
+                self.table_status_var.set("Saving... later edits are saved next")
+            else:
+                logger.debug("No changes to save")
+                self.table_status_var.set("No changes to save")
+
+    def autosave(self):
+        """Fold journalled edits into the working store, then schedule the next autosave."""
+        self.start_compaction()
+        self.root.after(AUTOSAVE_MS, self.autosave)
+
+    def start_compaction(self):
+        """Start saving the edited rows on a background thread; returns it, or None if not started.
+
+        The thread writes a copy of the table, so editing can go on; edits made
+        meanwhile go to a fresh journal and are saved by the next compaction.
+        """
+        if not self.dirty_rows or (self.compaction is not None and self.compaction.is_alive()):
+            return None
+        rows = sorted(self.dirty_rows)
+        snapshot = self.df.copy()
+        self.journal.rotate()
+        # Only now are the rows in the rotated journal; if rotate() failed they stay dirty
+        self.dirty_rows.clear()
+        self.compaction_error = None
+        self.compaction = threading.Thread(target=self.run_compaction, args=(snapshot, rows))
+        self.compaction.start()
+        self.table_status_var.set("Saving...")
+        self.root.after(LOAD_POLL_MS, self.check_compaction)
+        return self.compaction
+
+    def run_compaction(self, snapshot, rows):
+        """Write the snapshot to the store. Runs on the compaction thread."""
         try:
-            self.df.to_excel(OUTPUT_FILE, index=False)
-            print(f"Updated data saved to: {OUTPUT_FILE}")
-            messagebox.showinfo("Success", f"Data saved successfully to {OUTPUT_FILE}")
+            self.journal.compact(self.store, snapshot, rows=rows)
+            logger.info("Saved %s edited rows to: %s", len(rows), self.store.path)
         except Exception as e:
-            print(f"Error saving data: {str(e)}")
-            messagebox.showerror("Error", f"Error saving data: {str(e)}")
+            # The rotated journal stays on disk, so the rows are saved again next time
+            self.dirty_rows.update(rows)
+            self.compaction_error = e
 
-def main():
+    def check_compaction(self):
+        """Report the result of the compaction once its thread has finished."""
+        if self.compaction.is_alive():
+            self.root.after(LOAD_POLL_MS, self.check_compaction)
+            return
+        if self.compaction_error is not None:
+            logger.error("Error saving data: %s", self.compaction_error)
+            self.table_status_var.set("Save failed")
+            messagebox.showerror("Error", f"Error saving data: {str(self.compaction_error)}")
+        else:
+            self.table_status_var.set(f"Saved to {os.path.basename(self.store.path)}")
+
+    def on_close(self):
+        """Save outstanding edits before the window closes; the journal keeps them if that fails."""
+        if self.journal is not None:
+            if self.compaction is not None:
+                self.compaction.join()
+            if self.start_compaction() is not None:
+                self.compaction.join()
+            if self.compaction_error is not None:
+                logger.error("Error saving data: %s", self.compaction_error)
+            self.journal.close()
+        self.root.destroy()
+
+    def export_data(self):
+        """Export the assignment table to the Excel output file with dropdowns."""
+        try:
+            write_shelf_workbook(self.df, self.categories, OUTPUT_FILE)
+            record_excel_sync(self.store.path, OUTPUT_FILE)
+            logger.info("Exported %s rows to: %s", len(self.df), OUTPUT_FILE)
+            messagebox.showinfo("Success", f"Data exported successfully to {OUTPUT_FILE}")
+        except Exception as e:
+            logger.error("Error exporting data: %s", e)
+            messagebox.showerror("Error", f"Error exporting data: {str(e)}")
+
+    def import_data(self, confirm=True):
+        """Replace the assignment table with the Excel output file, e.g. after editing it in Excel.
+
+        The store is overwritten and its journal discarded, so edits made here since
+        the last export are lost; confirm asks first.
+        """
+        if not self.editing_ready:
+            self.table_status_var.set(LOADING_EDIT_MESSAGE)
+            return
+        if not os.path.exists(OUTPUT_FILE):
+            messagebox.showerror("Error", f"Output file not found: {OUTPUT_FILE}")
+            return
+        if confirm and not messagebox.askyesno(
+                "Import from Excel",
+                f"Replace the assignments with the contents of {OUTPUT_FILE}?\nEdits not exported to that file are lost."):
+            return
+        try:
+            # No save may still be writing the old table, and the journal file must be closed before it is discarded
+            if self.compaction is not None:
+                self.compaction.join()
+            self.journal.close()
+            df = import_excel(OUTPUT_FILE, self.store)
+        except Exception as e:
+            logger.error("Error importing data: %s", e)
+            messagebox.showerror("Error", f"Error importing data: {str(e)}")
+            return
+        
+        # Everything derived from the old table is rebuilt
+        self.df = to_compact(ensure_assignment_columns(df), self.categories)
+        self.shelf_index.rebuild(self.df)
+        self.history = EditHistory()
+        self.dirty_rows.clear()
+        self.build_palette()
+        self.sections = sorted(self.df['Section'].unique().tolist())
+        self.aisles = sorted(self.df['Aisle'].unique().tolist())
+        self.sides = sorted(self.df['Side'].unique().tolist())
+        self.section_dropdown["values"] = self.sections
+        self.aisle_dropdown["values"] = self.aisles
+        self.side_dropdown["values"] = self.sides
+        self.clear_scene()
+        self.overview_bays = None
+        self.apply_filter()
+        self.request_redraw("data")
+        self.request_overview()
+        self.table_status_var.set(f"Imported {len(self.df)} rows from {os.path.basename(OUTPUT_FILE)}")
+
+def main(argv=None):
     """Main function to launch the GUI."""
+    parser = argparse.ArgumentParser(description="Edit shelf assignments.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress and diagnostics")
+    args = parser.parse_args(argv)
+    configure_logging(args.verbose)
+    
     if not os.path.exists(FAMILY_FILE):
-        print(f"Family file not found: {FAMILY_FILE}")
+        logger.error("Family file not found: %s", FAMILY_FILE)
         return
-    if not os.path.exists(OUTPUT_FILE):
-        print(f"Output file not found: {OUTPUT_FILE}")
+    if not os.path.exists(STORE_FILE) and not os.path.exists(OUTPUT_FILE):
+        logger.error("Neither the store nor the output file was found: %s, %s", STORE_FILE, OUTPUT_FILE)
         return
     
     root = tk.Tk()
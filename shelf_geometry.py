@@ -0,0 +1,126 @@
+# Base area a bay's grid is fitted into, and the largest cell size, at scale 1
+BASE_GRID_WIDTH = 1000
+BASE_GRID_HEIGHT = 600
+MAX_CELL_WIDTH = 60
+MAX_CELL_HEIGHT = 80
+# Depth of the 3D effect and the space kept for the level (left) and shelf (top) labels, at scale 1
+DEPTH = 10
+LABEL_SPACE_LEFT = 50
+LABEL_SPACE_TOP = 30
+# Base font sizes of the category text on a shelf and of the level/shelf labels
+SHELF_FONT_BASE = 8
+LABEL_FONT_BASE = 10
+# Space kept free on each side of a category label inside the front face
+TEXT_PADDING = 10
+# Fill colors of the faces of a shelf
+FACE_COLORS = {'front': "#d3d3d3", 'top': "#f0f0f0", 'right': "#c0c0c0"}
+
+# Category label colors (eye-friendly, high-contrast), as Tk color names with their RGB values
+PALETTE = [
+    "darkblue",    # Deep blue
+    "darkgreen",   # Forest green
+    "darkred",     # Deep red
+    "purple4",     # Dark purple
+    "darkorange",  # Muted orange
+    "saddlebrown", # Earthy brown
+    "deeppink4",   # Muted pink
+    "teal",        # Teal
+    "darkmagenta", # Dark magenta
+    "olive",       # Olive green
+    "navy",        # Navy blue
+    "coral4",      # Muted coral
+    "goldenrod",   # Muted gold
+    "darkviolet",  # Dark violet
+    "seagreen",    # Sea green
+    "indigo"       # Indigo
+]
+COLOR_HEX = {
+    "darkblue": "#00008b", "darkgreen": "#006400", "darkred": "#8b0000", "purple4": "#551a8b",
+    "darkorange": "#ff8c00", "saddlebrown": "#8b4513", "deeppink4": "#8b0a50", "teal": "#008080",
+    "darkmagenta": "#8b008b", "olive": "#808000", "navy": "#000080", "coral4": "#8b3e2f",
+    "goldenrod": "#daa520", "darkviolet": "#9400d3", "seagreen": "#2e8b57", "indigo": "#4b0082",
+    "black": "#000000", "white": "#ffffff"
+}
+
+# Advance widths of Helvetica-Bold (1/1000 em) for printable ASCII, from the standard PDF font metrics
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,  # space to /
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,  # 0 to ?
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,  # @ to O
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,  # P to _
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,  # ` to o
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584        # p to ~
+]
+_DEFAULT_WIDTH = 611
+
+def base_cell_size(max_level, max_shelf):
+    """(width, height) of a shelf at scale 1 for a bay of max_level x max_shelf shelves."""
+    return (min(BASE_GRID_WIDTH // max_shelf, MAX_CELL_WIDTH),
+            min(BASE_GRID_HEIGHT // max_level, MAX_CELL_HEIGHT))
+
+def grid_size(max_level, max_shelf, cell_width, cell_height, scale=1.0):
+    """(width, height) of a bay's drawing, including the 3D depth and the label space."""
+    depth = DEPTH * scale
+    return (max_shelf * cell_width + depth + LABEL_SPACE_LEFT * scale,
+            max_level * cell_height + depth + LABEL_SPACE_TOP * scale)
+
+def cell_rect(level, shelf, max_level, cell_width, cell_height, offset_x, offset_y):
+    """(x1, y1, x2, y2) of a shelf's front face; offset_x/offset_y is the grid's top-left corner."""
+    display_row = max_level - level  # Level 1 at the top, max_level at the bottom
+    x1 = (shelf - 1) * cell_width + offset_x
+    y1 = display_row * cell_height + offset_y
+    return x1, y1, x1 + cell_width, y1 + cell_height
+
+def cell_faces(x1, y1, x2, y2, depth):
+    """Polygons (flat x, y lists) of the front, top and right faces of the shelf at (x1, y1, x2, y2)."""
+    # Adjust for 3D effect (top-left corner shifted for perspective)
+    x1_3d = x1 + depth
+    x2_3d = x2 + depth
+    return {
+        'front': [x1_3d, y1, x2_3d, y1, x2, y2, x1, y2],
+        'top': [x1_3d, y1, x2_3d, y1, x2_3d - depth, y1 - depth, x1_3d - depth, y1 - depth],
+        'right': [x2_3d, y1, x2_3d - depth, y1 - depth, x2 - depth, y2 - depth, x2, y2]
+    }
+
+def text_position(x1, y1, x2, y2, depth):
+    """Center of the category label of the shelf at (x1, y1, x2, y2)."""
+    return (x1 + x2) / 2 + depth / 2, (y1 + y2) / 2
+
+def shelf_label_position(shelf, cell_width, offset_x, offset_y, scale=1.0):
+    """Center of the "S<n>" label above a column of shelves."""
+    return (shelf - 1) * cell_width + offset_x + cell_width / 2, offset_y - DEPTH * scale - 10 * scale
+
+def level_label_position(level, max_level, cell_height, offset_x, offset_y, scale=1.0):
+    """Center of the "L<n>" label left of a row of shelves."""
+    display_row = max_level - level
+    return offset_x - DEPTH * scale - 30 * scale, display_row * cell_height + offset_y + cell_height / 2
+
+def text_width(text, font_size):
+    """Width of text in bold Helvetica at font_size, from the font's metrics (no display needed)."""
+    return sum(_HELVETICA_BOLD_WIDTHS[code - 32] if 32 <= code <= 126 else _DEFAULT_WIDTH
+               for code in map(ord, text)) * font_size / 1000
+
+def wrap_label(text, max_width, measure):
+    """Split text into lines no wider than max_width, measure(line) giving a line's width.
+
+    Greedy: words are added to the line while it still fits; a word wider than
+    max_width gets a line of its own.
+    """
+    lines = []
+    for word in text.split():
+        if lines and measure(f"{lines[-1]} {word}") <= max_width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return lines
+
+def store_palette(categories, families_dict=None):
+    """{category: palette color} for the categories in use and those of the catalog.
+
+    Catalog categories come first, in catalog order, then store-only ones sorted by
+    name. The order does not depend on how a store orders its categories (a save
+    can reorder them), so a category keeps its color across saves and views.
+    """
+    ordered = dict.fromkeys(str(category) for cats in (families_dict or {}).values() for category in cats)
+    ordered.update(dict.fromkeys(sorted(str(category) for category in categories if str(category) not in ordered)))
+    return {category: PALETTE[idx % len(PALETTE)] for idx, category in enumerate(ordered)}
@@ -0,0 +1,316 @@
+import numpy as np
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+import math
+import os
+import re
+import sys
+import time
+import zlib
+from xml.sax.saxutils import escape
+
+from generate_shelf_assignment import FAMILY_FILE, STORE_FILE, configure_logging, load_family_data
+from shelf_geometry import (COLOR_HEX, DEPTH, FACE_COLORS, LABEL_FONT_BASE, LABEL_SPACE_LEFT, LABEL_SPACE_TOP,
+                            SHELF_FONT_BASE, TEXT_PADDING, base_cell_size, cell_faces, cell_rect, grid_size,
+                            level_label_position, shelf_label_position, store_palette, text_position,
+                            text_width, wrap_label)
+from shelf_store import ChangeJournal, open_store
+from shelf_table import ShelfIndex, to_compact
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # PNG export needs Pillow; SVG and PDF are written without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Export formats; the PDF holds every bay of the store, one page each
+FORMATS = ('svg', 'png', 'pdf')
+PLANOGRAM_PDF = "planogram.pdf"
+# Blank border around a bay and the height of its title line, in points
+PAGE_MARGIN = 36
+TITLE_HEIGHT = 30
+TITLE_FONT_SIZE = 14
+# Line spacing of wrapped labels, relative to the font size
+LINE_SPACING = 1.2
+# Pixels per point of the PNG files
+PNG_SCALE = 2
+# Bays rendered per worker task, to keep inter-process overhead low on stores with many small bays
+BAYS_PER_TASK = 32
+
+def bay_file_name(section, aisle, side):
+    """File name (without extension) of one bay's planogram."""
+    return re.sub(r"[^\w.-]+", "_", f"{section}_aisle{aisle}_side{side}")
+
+def bay_scene(section, aisle, side, cells, colors):
+    """Drawing of one bay as the Shelf View shows it at scale 1.
+
+    cells is a list of (level, shelf, category) with "" for unassigned shelves, and
+    colors maps a category to its palette color. Returns {'width', 'height', 'items'},
+    items being ('polygon', points, fill) and ('text', x, y, lines, size, color, bold)
+    in drawing order; text is centered on (x, y).
+    """
+    max_level = max(level for level, _, _ in cells)
+    max_shelf = max(shelf for _, shelf, _ in cells)
+    cell_width, cell_height = base_cell_size(max_level, max_shelf)
+    total_width, total_height = grid_size(max_level, max_shelf, cell_width, cell_height)
+    offset_x = PAGE_MARGIN + LABEL_SPACE_LEFT
+    offset_y = PAGE_MARGIN + TITLE_HEIGHT + LABEL_SPACE_TOP
+    width = total_width + 2 * PAGE_MARGIN
+
+    items = [('text', width / 2, PAGE_MARGIN + TITLE_FONT_SIZE / 2, [f"Section {section}  Aisle {aisle}  Side {side}"],
+              TITLE_FONT_SIZE, "black", True)]
+    for shelf in range(1, max_shelf + 1):
+        items.append(('text', *shelf_label_position(shelf, cell_width, offset_x, offset_y), [f"S{shelf}"], LABEL_FONT_BASE, "black", False))
+    for level in range(1, max_level + 1):
+        items.append(('text', *level_label_position(level, max_level, cell_height, offset_x, offset_y), [f"L{level}"], LABEL_FONT_BASE, "black", False))
+
+    # Every grid position gets its faces, as in the Shelf View; labels only where a category is assigned
+    categories = {(level, shelf): category for level, shelf, category in cells}
+    layouts = {}
+    for level in range(1, max_level + 1):
+        for shelf in range(1, max_shelf + 1):
+            x1, y1, x2, y2 = cell_rect(level, shelf, max_level, cell_width, cell_height, offset_x, offset_y)
+            for face, points in cell_faces(x1, y1, x2, y2, DEPTH).items():
+                items.append(('polygon', points, FACE_COLORS[face]))
+            category = categories.get((level, shelf), "")
+            if category:
+                if category not in layouts:
+                    layouts[category] = wrap_label(category, cell_width - TEXT_PADDING, lambda line: text_width(line, SHELF_FONT_BASE))
+                items.append(('text', *text_position(x1, y1, x2, y2, DEPTH), layouts[category], SHELF_FONT_BASE,
+                              colors.get(category, "black"), True))
+    return {'width': width, 'height': total_height + 2 * PAGE_MARGIN + TITLE_HEIGHT, 'items': items}
+
+def _hex(color):
+    """'#rrggbb' for a palette color name (or a color already in that form)."""
+    return COLOR_HEX.get(color, color)
+
+def _baselines(y, count, size):
+    """Baselines of count lines of text vertically centered on y."""
+    line_height = size * LINE_SPACING
+    first = y - (count - 1) * line_height / 2 + size * 0.35  # 0.35 em: from the middle of a line to its baseline
+    return [first + idx * line_height for idx in range(count)]
+
+def render_svg(scene):
+    """SVG document of a bay scene."""
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{scene["width"]:g}" height="{scene["height"]:g}" '
+             f'viewBox="0 0 {scene["width"]:g} {scene["height"]:g}">',
+             '<rect width="100%" height="100%" fill="white"/>']
+    for item in scene['items']:
+        if item[0] == 'polygon':
+            points = item[1]
+            coords = " ".join(f"{points[idx]:g},{points[idx + 1]:g}" for idx in range(0, len(points), 2))
+            parts.append(f'<polygon points="{coords}" fill="{_hex(item[2])}" stroke="black"/>')
+        else:
+            _, x, y, lines, size, color, bold = item
+            weight = ' font-weight="bold"' if bold else ''
+            spans = "".join(f'<tspan x="{x:g}" y="{baseline:g}">{escape(line)}</tspan>'
+                            for line, baseline in zip(lines, _baselines(y, len(lines), size)))
+            parts.append(f'<text font-family="Helvetica, Arial, sans-serif" font-size="{size}"{weight} '
+                         f'fill="{_hex(color)}" text-anchor="middle">{spans}</text>')
+    parts.append('</svg>')
+    return "\n".join(parts) + "\n"
+
+def _load_png_font(size, bold):
+    """A TrueType font for PNG labels, falling back to Pillow's built-in font."""
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+def render_png(scene, path):
+    """Write a bay scene to a PNG file (needs Pillow)."""
+    image = Image.new("RGB", (int(scene['width'] * PNG_SCALE), int(scene['height'] * PNG_SCALE)), "white")
+    draw = ImageDraw.Draw(image)
+    fonts = {}
+    for item in scene['items']:
+        if item[0] == 'polygon':
+            draw.polygon([value * PNG_SCALE for value in item[1]], fill=_hex(item[2]), outline="black")
+            continue
+        _, x, y, lines, size, color, bold = item
+        key = (size * PNG_SCALE, bold)
+        if key not in fonts:
+            fonts[key] = _load_png_font(*key)
+        for line, baseline in zip(lines, _baselines(y, len(lines), size)):
+            left = x * PNG_SCALE - draw.textlength(line, font=fonts[key]) / 2
+            draw.text((left, (baseline - size * 0.8) * PNG_SCALE), line, font=fonts[key], fill=_hex(color))
+    image.save(path)
+
+def _pdf_color(color):
+    """'r g b' (0-1) operands of a palette color."""
+    value = _hex(color).lstrip("#")
+    return " ".join(f"{int(value[idx:idx + 2], 16) / 255:.3g}" for idx in (0, 2, 4))
+
+def _pdf_text(text):
+    """text as a PDF string literal in the standard fonts' encoding."""
+    data = text.encode("cp1252", errors="replace").decode("latin-1")
+    return "(" + data.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def render_pdf_page(scene):
+    """Compressed content stream of one PDF page drawing a bay scene.
+
+    PDF y runs upwards, so y is flipped against the page height. Text uses the
+    standard Helvetica fonts (/F1 regular, /F2 bold), whose widths text_width() knows.
+    """
+    height = scene['height']
+    ops = ["0.75 w 0 0 0 RG"]
+    for item in scene['items']:
+        if item[0] == 'polygon':
+            points = item[1]
+            path = [f"{points[0]:.2f} {height - points[1]:.2f} m"]
+            path += [f"{points[idx]:.2f} {height - points[idx + 1]:.2f} l" for idx in range(2, len(points), 2)]
+            ops.append(f"{_pdf_color(item[2])} rg " + " ".join(path) + " h B")
+            continue
+        _, x, y, lines, size, color, bold = item
+        for line, baseline in zip(lines, _baselines(y, len(lines), size)):
+            left = x - text_width(line, size) / 2
+            ops.append(f"BT /{'F2' if bold else 'F1'} {size} Tf {_pdf_color(color)} rg "
+                       f"{left:.2f} {height - baseline:.2f} Td {_pdf_text(line)} Tj ET")
+    return zlib.compress("\n".join(ops).encode("latin-1"))
+
+def write_pdf(pages, path):
+    """Write a multi-page PDF from (width, height, compressed content stream) pages."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+    ]
+    page_ids = []
+    for width, height, stream in pages:
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+                        f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {len(objects)} 0 R >>").encode())
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    # Write next to the target and swap in, so a failed export never leaves a partial file
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        f.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    os.replace(temp_file, path)
+
+def _render_bays_task(bays, out_dir, formats):
+    """Render a group of bays in a worker process.
+
+    Returns [(bay key, PDF page or None, error or None)]; one failing bay does not stop the others.
+    """
+    results = []
+    for key, cells, colors in bays:
+        try:
+            scene = bay_scene(*key, cells, colors)
+            name = os.path.join(out_dir, bay_file_name(*key))
+            if 'svg' in formats:
+                with open(name + ".svg", "w", encoding="utf-8") as f:
+                    f.write(render_svg(scene))
+            if 'png' in formats:
+                render_png(scene, name + ".png")
+            page = (scene['width'], scene['height'], render_pdf_page(scene)) if 'pdf' in formats else None
+            results.append((key, page, None))
+        except Exception as e:
+            results.append((key, None, f"{type(e).__name__}: {str(e)}"))
+    return results
+
+def load_planogram_table(store_path, families_dict=None):
+    """The store's assignment table with its journalled edits, compact as in the GUI."""
+    df = to_compact(open_store(store_path, families_dict).load())
+    ChangeJournal(store_path).replay(df)
+    return to_compact(df, families_dict)
+
+def export_planograms(store_path, out_dir, formats=('svg', 'pdf'), families_dict=None, workers=None):
+    """Render every bay of a store to out_dir on a process pool.
+
+    Writes one file per bay and format, plus PLANOGRAM_PDF with one page per bay in
+    store order when 'pdf' is among formats. Returns {bay key: error or None}.
+    """
+    formats = set(formats)
+    unknown = formats.difference(FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported planogram format '{', '.join(sorted(unknown))}' (use {', '.join(FORMATS)})")
+    if 'png' in formats and Image is None:
+        logger.warning("Pillow is not installed; skipping PNG export")
+        formats.discard('png')
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    df = load_planogram_table(store_path, families_dict)
+    index = ShelfIndex(df)
+    categories = df['Category'].cat.categories
+    colors = store_palette(categories, families_dict)
+    # Category names by code, with "" last so code -1 (unassigned) maps to it
+    names = np.array([str(category) for category in categories] + [""], dtype=object)
+    codes = df['Category'].cat.codes.to_numpy()
+
+    # Send each worker only the shelves of its bays, as plain lists
+    bays = []
+    for key in sorted(index.bays):
+        rows = index.bays[key]
+        bay_names = names[codes[rows]].tolist()
+        cells = list(zip(index.levels[rows].tolist(), index.shelves[rows].tolist(), bay_names))
+        bays.append((key, cells, {name: colors[name] for name in set(bay_names) if name}))
+
+    results = {}
+    pages = {}
+    # At most BAYS_PER_TASK per task, fewer on small stores so every worker gets some
+    per_task = max(1, min(BAYS_PER_TASK, math.ceil(len(bays) / (workers or os.cpu_count() or 1))))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_bays_task, bays[idx:idx + per_task], out_dir, formats)
+                   for idx in range(0, len(bays), per_task)]
+        for future in as_completed(futures):
+            for key, page, error in future.result():
+                results[key] = error
+                if page is not None:
+                    pages[key] = page
+            logger.info("[%s/%s] bays rendered", len(results), len(bays))
+
+    if 'pdf' in formats and pages:
+        write_pdf([pages[key] for key, _, _ in bays if key in pages], os.path.join(out_dir, PLANOGRAM_PDF))
+    failures = [key for key, error in results.items() if error]
+    logger.info("Exported %s bays from %s to %s in %.2fs: %s failed",
+                len(bays), store_path, out_dir, time.perf_counter() - start, len(failures))
+    for key in failures:
+        logger.error("Bay %s failed: %s", key, results[key])
+    return results
+
+def main(argv=None):
+    """Export printable planograms of every bay in a store, without a display."""
+    parser = argparse.ArgumentParser(description="Export shelf planograms to SVG, PNG and PDF.")
+    parser.add_argument("store", nargs="?", default=STORE_FILE, help="store file (.npz, .xlsx or .parquet)")
+    parser.add_argument("-o", "--output-dir", default="planograms", help="directory receiving the planograms")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=FORMATS, default=['svg', 'pdf'],
+                        help="formats to write (png needs Pillow); pdf is one document with a page per bay")
+    parser.add_argument("-f", "--family-file", default=FAMILY_FILE,
+                        help="family catalog, so category colors match the GUI (optional)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress and diagnostics")
+    args = parser.parse_args(argv)
+    configure_logging(args.verbose)
+
+    if not os.path.exists(args.store):
+        logger.error("Store file not found: %s", args.store)
+        return 1
+    families_dict = None
+    if os.path.exists(args.family_file):
+        _, families_dict = load_family_data(args.family_file)
+    else:
+        logger.warning("Family file not found: %s; colors follow the store's categories only", args.family_file)
+
+    try:
+        results = export_planograms(args.store, args.output_dir, args.formats, families_dict, args.workers)
+    except Exception as e:
+        logger.error("Error exporting planograms: %s", e)
+        return 1
+    return 1 if any(results.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
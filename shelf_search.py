@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import bisect
+import shlex
+from collections import defaultdict
+
+# Length of the character n-grams used for substring and fuzzy matching
+NGRAM = 3
+# Share of the query's n-grams a fuzzy match must contain
+FUZZY_CUTOFF = 0.4
+# Coordinate columns accepted in filter queries, e.g. "aisle:3"
+FILTER_COORDINATES = {'section': 'Section', 'aisle': 'Aisle', 'side': 'Side', 'level': 'Level', 'shelf': 'Shelf'}
+FILTER_TEXT = {'family': 'Family', 'category': 'Category'}
+
+def _ngrams(text):
+    """Character n-grams of text, padded so short words still have some."""
+    padded = f" {text} "
+    return {padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1))}
+
+class SearchIndex:
+    """Case-insensitive type-ahead lookup over a list of names (families or categories).
+
+    Prefix matches come from a sorted copy of the names, substring and fuzzy
+    matches from an n-gram index, and substring matches of queries shorter than
+    NGRAM from an index of every shorter substring, so a lookup never scans the
+    whole list.
+    """
+
+    def __init__(self, values):
+        self.values = [str(value) for value in values]
+        self.keys = [value.lower() for value in self.values]
+        self.sorted = sorted((key, idx) for idx, key in enumerate(self.keys))
+        self.sorted_keys = [key for key, _ in self.sorted]
+        self.postings = defaultdict(list)
+        # Substrings shorter than NGRAM (1- and 2-grams) -> positions of the names containing them
+        self.short_postings = defaultdict(list)
+        for idx, key in enumerate(self.keys):
+            for gram in _ngrams(key):
+                self.postings[gram].append(idx)
+            for gram in {key[i:i + size] for size in range(1, NGRAM) for i in range(len(key) - size + 1)}:
+                self.short_postings[gram].append(idx)
+
+    def prefix(self, text):
+        """Positions of the names starting with text."""
+        text = text.lower()
+        start = bisect.bisect_left(self.sorted_keys, text)
+        end = bisect.bisect_left(self.sorted_keys, text + "\uffff")
+        return sorted(idx for _, idx in self.sorted[start:end])
+
+    def _candidates(self, text):
+        """{position: number of text's n-grams the name shares}."""
+        counts = defaultdict(int)
+        for gram in _ngrams(text):
+            for idx in self.postings.get(gram, ()):
+                counts[idx] += 1
+        return counts
+
+    def substring(self, text):
+        """Positions of the names containing text."""
+        text = text.lower()
+        if len(text) < NGRAM:
+            return list(self.short_postings.get(text, ()))
+        # Only the n-grams fully inside text must occur in a name that contains it
+        inner = [text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)]
+        candidates = set(self.postings.get(inner[0], ()))
+        for gram in inner[1:]:
+            candidates.intersection_update(self.postings.get(gram, ()))
+        return sorted(idx for idx in candidates if text in self.keys[idx])
+
+    def fuzzy(self, text, limit=20):
+        """Positions of the names sharing most n-grams with text, best first (tolerates typos)."""
+        text = text.lower()
+        needed = len(_ngrams(text)) * FUZZY_CUTOFF
+        scored = [(-count, idx) for idx, count in self._candidates(text).items() if count >= needed]
+        return [idx for _, idx in sorted(scored)[:limit]]
+
+    def search(self, text, limit=None):
+        """Names matching text: prefix matches, then other substring matches, then fuzzy ones."""
+        text = text.strip()
+        if not text:
+            return self.values[:limit] if limit else list(self.values)
+        found = list(self.prefix(text))
+        seen = set(found)
+        found += [idx for idx in self.substring(text) if idx not in seen]
+        if not found:
+            found = self.fuzzy(text)
+        if limit:
+            found = found[:limit]
+        return [self.values[idx] for idx in found]
+
+def _category_mask(column, matches):
+    """Mask of a text column from a test on its distinct lower-cased values only.
+
+    matches takes an Index of the values and returns a boolean array; blank cells
+    are tested as "".
+    """
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype('category')
+    names = pd.Index(column.cat.categories.astype(str)).str.lower()
+    matching = np.flatnonzero(matches(names))
+    codes = column.cat.codes.to_numpy()
+    mask = np.isin(codes, matching)
+    if matches(pd.Index([""]))[0]:
+        mask |= codes == -1
+    return mask
+
+def _text_match(column, pattern):
+    """Mask of a text column whose value contains pattern (case-insensitive)."""
+    pattern = pattern.lower()
+    return _category_mask(column, lambda names: names.str.contains(pattern, regex=False) & (names != ""))
+
+def filter_rows(df, query):
+    """Row positions of the shelves matching a filter query.
+
+    A query is a list of terms that must all hold, e.g. 'category:milk' or
+    'unassigned aisle:3':
+    - section:, aisle:, side:, level:, shelf: a coordinate value (aisle:3 or aisle:3,4)
+    - family:, category: names containing the text, case-insensitive
+    - unassigned / assigned: shelves without / with a Category
+    - any other word: Family or Category containing it
+    Quote values with spaces: category:"soft drinks". Raises ValueError on a bad term.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    try:
+        terms = shlex.split(query)
+    except ValueError as e:
+        raise ValueError(f"Invalid filter '{query}': {str(e)}")
+    for term in terms:
+        key, _, value = term.partition(":")
+        key = key.lower()
+        if value and key in FILTER_COORDINATES:
+            column = df[FILTER_COORDINATES[key]]
+            values = value.split(",")
+            if key == 'section':
+                wanted = [v.lower() for v in values]
+                mask &= _category_mask(column, lambda names: names.isin(wanted))
+            else:
+                try:
+                    mask &= column.isin([int(v) for v in values]).to_numpy()
+                except ValueError:
+                    raise ValueError(f"{key} needs whole numbers, got '{value}'")
+        elif value and key in FILTER_TEXT:
+            mask &= _text_match(df[FILTER_TEXT[key]], value)
+        elif term.lower() in ('unassigned', 'assigned'):
+            blank = _category_mask(df['Category'], lambda names: names == "")
+            mask &= blank if term.lower() == 'unassigned' else ~blank
+        elif value:
+            raise ValueError(f"Unknown filter field '{key}' (use {', '.join(list(FILTER_COORDINATES) + list(FILTER_TEXT))})")
+        else:
+            mask &= _text_match(df['Family'], term) | _text_match(df['Category'], term)
+    return np.flatnonzero(mask)
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+def _blank_mask(values):
+    """True where a Family/Category value is missing or empty."""
+    series = pd.Series(values)
+    return (series.isna() | (series.astype(str) == "")).to_numpy()
+
+def bay_order(shelf_df):
+    """Return row positions in placement order and the bay number of each position.
+
+    Bays (Section, Aisle, Side) follow each other in store order; inside a bay the
+    shelves are walked column by column (Shelf, then Level), so a family laid down in
+    this order forms vertical blocks.
+    """
+    section_codes, _ = pd.factorize(shelf_df['Section'], sort=True)
+    keys = [shelf_df[name].to_numpy() for name in ('Level', 'Shelf', 'Side', 'Aisle')]
+    order = np.lexsort(keys + [section_codes])
+
+    # A new bay starts wherever Section, Aisle or Side changes along the order
+    bay_keys = np.column_stack([section_codes, shelf_df['Aisle'].to_numpy(), shelf_df['Side'].to_numpy()])[order]
+    new_bay = np.ones(len(order), dtype=bool)
+    new_bay[1:] = (bay_keys[1:] != bay_keys[:-1]).any(axis=1)
+    return order, np.cumsum(new_bay) - 1
+
+def _scale_targets(needs, capacity):
+    """Scale needs down proportionally (largest remainder) so they fit in capacity."""
+    total = needs.sum()
+    if total <= capacity:
+        return needs
+    exact = needs * (capacity / total)
+    scaled = np.floor(exact).astype(np.int64)
+    leftover = capacity - scaled.sum()
+    scaled[np.argsort(scaled - exact)[:leftover]] += 1
+    return scaled
+
+def solve_assignment(shelf_df, families_dict, targets, locked=None):
+    """Assign categories to shelves automatically.
+
+    targets maps (family, category) to the number of shelves wanted. Shelves flagged in
+    `locked` (a boolean array; by default every shelf that already has a Category) keep
+    their values and count towards the targets. Each family is kept contiguous inside
+    its bays: families are placed largest first into the bay with the tightest free
+    space that still fits them (best-fit decreasing), and only spill across bays when
+    no single bay is large enough. If the targets exceed the free shelves they are
+    scaled down proportionally.
+
+    Returns a copy of shelf_df with Family and Category filled in.
+    """
+    result = shelf_df.copy()
+    n = len(result)
+    families = np.array([family for family, _ in targets], dtype=object)
+    categories = np.array([category for _, category in targets], dtype=object)
+    needs = np.array([max(int(count), 0) for count in targets.values()], dtype=np.int64)
+
+    current_family = result['Family'].to_numpy(dtype=object) if 'Family' in result else np.full(n, None, dtype=object)
+    current_category = result['Category'].to_numpy(dtype=object) if 'Category' in result else np.full(n, None, dtype=object)
+    if locked is None:
+        locked = ~_blank_mask(current_category)
+    locked = np.asarray(locked, dtype=bool)
+
+    # Locked shelves already holding a target category count towards it
+    if locked.any():
+        held = pd.Series(list(zip(current_family[locked], current_category[locked]))).value_counts()
+        needs = np.maximum(needs - np.array([held.get(key, 0) for key in targets], dtype=np.int64), 0)
+
+    order, bay_of = bay_order(result)
+    free = order[~locked[order]]
+    free_bay = bay_of[~locked[order]]
+    needs = _scale_targets(needs, len(free))
+
+    # Free shelves of each bay form one contiguous slice of `free`
+    num_bays = int(bay_of[-1]) + 1 if n else 0
+    bay_start = np.searchsorted(free_bay, np.arange(num_bays))
+    bay_cursor = bay_start.copy()
+    bay_end = np.searchsorted(free_bay, np.arange(num_bays), side="right")
+
+    # Targets grouped by family, in catalog order, so each family's categories stay together
+    family_rank = {family: idx for idx, family in enumerate(families_dict)}
+    family_names = list(dict.fromkeys(families))
+    family_names.sort(key=lambda family: family_rank.get(family, len(family_rank)))
+    family_targets = {family: np.flatnonzero(families == family) for family in family_names}
+    family_needs = {family: int(needs[idx].sum()) for family, idx in family_targets.items()}
+
+    assigned_positions = []
+    assigned_targets = []
+    for family in sorted(family_names, key=lambda family: -family_needs[family]):
+        need = family_needs[family]
+        if need == 0:
+            continue
+        # Category of each shelf in the family's block, in catalog order
+        block = np.repeat(family_targets[family], needs[family_targets[family]])
+
+        remaining = bay_end - bay_cursor
+        fits = np.flatnonzero(remaining >= need)
+        if len(fits):
+            bays = [fits[np.argmin(remaining[fits])]]
+        else:
+            # Spill over the emptiest bays, using as few as possible
+            bays = np.argsort(-remaining, kind="stable")
+        placed = 0
+        for bay in bays:
+            take = min(need - placed, remaining[bay])
+            if take <= 0:
+                break
+            assigned_positions.append(free[bay_cursor[bay]:bay_cursor[bay] + take])
+            assigned_targets.append(block[placed:placed + take])
+            bay_cursor[bay] += take
+            placed += take
+
+    new_family = current_family.copy()
+    new_category = current_category.copy()
+    if assigned_positions:
+        positions = np.concatenate(assigned_positions)
+        target_idx = np.concatenate(assigned_targets)
+        new_family[positions] = families[target_idx]
+        new_category[positions] = categories[target_idx]
+    result['Family'] = new_family
+    result['Category'] = new_category
+    return result
+
+def assignment_metrics(assigned_df, targets=None):
+    """Quality measures for an assignment.
+
+    - fragmentation: extra contiguous runs per family (0 means every family is one
+      unbroken block inside each bay it uses)
+    - bays_per_family: average number of bays a family occupies
+    - target_deviation: sum of |assigned - target| over the targets, relative to
+      the total target (0 means every target met exactly)
+    """
+    order, bay_of = bay_order(assigned_df)
+    family = assigned_df['Family'].to_numpy(dtype=object)[order]
+    category = assigned_df['Category'].to_numpy(dtype=object)[order]
+    assigned = ~_blank_mask(family)
+    family_codes, family_names = pd.factorize(pd.Series(family).where(assigned))
+
+    # A run starts wherever the family or the bay changes along the placement order
+    run_start = assigned.copy()
+    run_start[1:] &= (family_codes[1:] != family_codes[:-1]) | (bay_of[1:] != bay_of[:-1])
+    runs = np.bincount(family_codes[run_start], minlength=len(family_names))
+    bays_used = pd.DataFrame({'family': family_codes[assigned], 'bay': bay_of[assigned]}).drop_duplicates()
+    bays_per_family = bays_used.groupby('family').size().to_numpy()
+
+    metrics = {
+        'shelves': len(assigned_df),
+        'assigned': int(assigned.sum()),
+        'families': len(family_names),
+        'family_runs': int(runs.sum()),
+        'fragmentation': float((runs - bays_per_family).sum() / max(len(family_names), 1)),
+        'bays_per_family': float(bays_per_family.mean()) if len(bays_per_family) else 0.0
+    }
+    if targets:
+        counts = pd.Series(list(zip(family[assigned], category[assigned]))).value_counts()
+        wanted = np.array(list(targets.values()), dtype=np.int64)
+        actual = np.array([counts.get(key, 0) for key in targets], dtype=np.int64)
+        metrics['target_deviation'] = float(np.abs(actual - wanted).sum() / max(wanted.sum(), 1))
+    return metrics
@@ -0,0 +1,274 @@
+import numpy as np
+import pandas as pd
+import json
+import logging
+import os
+
+from openpyxl.utils import get_column_letter
+
+from generate_shelf_assignment import patch_output_cells, write_shelf_workbook
+from shelf_table import bulk_assign, is_blank
+
+logger = logging.getLogger(__name__)
+
+# Columns holding text; everything else in the assignment table is an integer coordinate
+STRING_COLUMNS = ['Section', 'Family', 'Category']
+
+# Suffixes of the change journal kept next to a store, and of the part being compacted
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".compacting"
+# Suffix of the record of the Excel output file's state when it was last imported into or exported from a store
+EXCEL_SYNC_SUFFIX = ".excel"
+
+class ExcelStore:
+    """Assignment table kept in an Excel workbook with Family/Category dropdowns."""
+
+    def __init__(self, path, families_dict=None):
+        self.path = path
+        self.families_dict = families_dict or {}
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Read the assignment table from the first sheet."""
+        return pd.read_excel(self.path)
+
+    def save(self, df, rows=None):
+        """Save df; when rows (changed row positions) is given, patch only those cells."""
+        if rows is not None and self.exists():
+            columns = list(df.columns)
+            updates = {row: (df.at[row, 'Family'], df.at[row, 'Category']) for row in rows}
+            patched = patch_output_cells(
+                self.path, updates,
+                family_col=get_column_letter(columns.index('Family') + 1),
+                category_col=get_column_letter(columns.index('Category') + 1)
+            )
+            if patched:
+                return
+        # Rewrite the whole workbook with its dropdowns
+        write_shelf_workbook(df, self.families_dict, self.path)
+
+class NpzStore:
+    """Columnar binary store: one numpy array per column in an uncompressed .npz archive.
+
+    Text columns are dictionary-encoded as int32 codes (-1 for blank) plus an array
+    of unique values, so loading never unpickles Python objects.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Read the assignment table, with text columns as categoricals."""
+        with np.load(self.path, allow_pickle=False) as data:
+            columns = [str(name) for name in data['columns']]
+            table = {}
+            for name in columns:
+                if f"{name}.codes" in data:
+                    # Text columns stay dictionary-encoded; blank cells (code -1) are missing values
+                    table[name] = pd.Categorical.from_codes(data[f"{name}.codes"], categories=data[f"{name}.values"])
+                else:
+                    table[name] = data[name]
+        return pd.DataFrame(table, columns=columns)
+
+    def save(self, df, rows=None):
+        """Write the whole table; it is small enough in binary form that partial saves are not needed."""
+        arrays = {'columns': np.array(list(df.columns), dtype=str)}
+        for name in df.columns:
+            column = df[name]
+            if name in STRING_COLUMNS or not pd.api.types.is_numeric_dtype(column):
+                codes, values = pd.factorize(column)
+                codes = codes.astype(np.int32)
+                values = np.array([str(v) for v in values], dtype=str)
+                # Blank strings are stored like missing values
+                codes[np.isin(codes, np.flatnonzero(values == ""))] = -1
+                arrays[f"{name}.codes"] = codes
+                arrays[f"{name}.values"] = values
+            else:
+                arrays[name] = column.to_numpy()
+
+        # Write next to the target and swap in, so a failed save never leaves a partial store
+        temp_file = self.path + ".tmp"
+        with open(temp_file, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp_file, self.path)
+
+class ParquetStore:
+    """Columnar store in a Parquet file (needs pyarrow or fastparquet installed)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        return pd.read_parquet(self.path)
+
+    def save(self, df, rows=None):
+        temp_file = self.path + ".tmp"
+        df.to_parquet(temp_file, index=False)
+        os.replace(temp_file, self.path)
+
+class ChangeJournal:
+    """Append-only log of Family/Category edits kept next to a store.
+
+    Every edit is one JSON line {"rows": [...], "family": ..., "category": ...} holding
+    the values the rows were set to, so replaying the journal in order over the
+    store's table restores the edits. compact() folds the journal into the store.
+    Rows are bare positions in that table, so whatever creates or replaces a store
+    must discard() its journal first.
+    """
+
+    def __init__(self, store_path):
+        self.path = store_path + JOURNAL_SUFFIX
+        self.compacting_path = self.path + COMPACTING_SUFFIX
+        self.file = None
+
+    def append(self, rows, family, category):
+        """Record that rows were set to family/category; flushed to the OS before returning."""
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        values = [None if is_blank(value) else str(value) for value in (family, category)]
+        record = {'rows': [int(row) for row in rows], 'family': values[0], 'category': values[1]}
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def append_rows(self, df, rows):
+        """Record the current Family/Category of rows, one record per distinct pair of values."""
+        rows = np.asarray(rows, dtype=np.intp)
+        if not len(rows):
+            return
+        values = df[['Family', 'Category']].iloc[rows].astype(object)
+        for (family, category), group in values.groupby(['Family', 'Category'], dropna=False, sort=False).indices.items():
+            self.append(rows[group], family, category)
+
+    def replay(self, df):
+        """Apply the journalled edits to df in order; returns the set of row positions edited."""
+        # Only the last value written to each row matters
+        latest = {}
+        for path in (self.compacting_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; everything before it is intact
+                        logger.warning("Skipping damaged journal line %s in %s", line_number, path)
+                        continue
+                    value = (record['family'], record['category'])
+                    for row in record['rows']:
+                        latest[row] = value
+        
+        # One assignment per distinct (family, category) instead of one per edit
+        groups = {}
+        for row, value in latest.items():
+            if row < len(df):
+                groups.setdefault(value, []).append(row)
+        for (family, category), rows in groups.items():
+            bulk_assign(df, rows, family, category)
+        edited = {row for rows in groups.values() for row in rows}
+        if edited:
+            logger.info("Replayed %s edited rows from %s", len(edited), self.path)
+        return edited
+
+    def rotate(self):
+        """Move the current journal aside for compaction; new edits start a fresh journal.
+
+        If an earlier compaction failed, its part is kept and the current journal is
+        appended to it, so no edit is ever dropped.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.compacting_path):
+            with open(self.path, "rb") as src, open(self.compacting_path, "ab") as dst:
+                dst.write(src.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.compacting_path)
+
+    def compact(self, store, df, rows=None):
+        """Save df (which must include every rotated edit) to store and drop the rotated journal."""
+        store.save(df, rows=rows)
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+        logger.info("Compacted journal into %s", store.path)
+
+    def discard(self):
+        """Delete the journal and any part being compacted; call it before the store is replaced.
+
+        Journal entries address rows by position, so replayed against a new table
+        they would land on other shelves.
+        """
+        self.close()
+        for path in (self.path, self.compacting_path):
+            if os.path.exists(path):
+                os.remove(path)
+                logger.info("Discarded journal %s written against the previous store", path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+STORE_BACKENDS = {
+    '.xlsx': ExcelStore,
+    '.npz': NpzStore,
+    '.parquet': ParquetStore
+}
+
+def open_store(path, families_dict=None):
+    """Return the storage backend for path, chosen by its file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in STORE_BACKENDS:
+        raise ValueError(f"Unsupported store format '{extension}' (use one of {', '.join(STORE_BACKENDS)})")
+    if extension == '.xlsx':
+        return ExcelStore(path, families_dict)
+    return STORE_BACKENDS[extension](path)
+
+def record_excel_sync(store_path, excel_file):
+    """Remember excel_file's size and modification time as in step with the store at store_path."""
+    stat = os.stat(excel_file)
+    with open(store_path + EXCEL_SYNC_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, f)
+
+def excel_changed(store_path, excel_file):
+    """True if excel_file was changed (e.g. edited in Excel) since it was last imported or exported.
+
+    Without a record from record_excel_sync(), a workbook newer than the store counts as changed.
+    """
+    if not os.path.exists(excel_file) or os.path.abspath(excel_file) == os.path.abspath(store_path):
+        return False
+    stat = os.stat(excel_file)
+    try:
+        with open(store_path + EXCEL_SYNC_SUFFIX, encoding="utf-8") as f:
+            synced = json.load(f)
+    except (OSError, ValueError):
+        return os.path.exists(store_path) and stat.st_mtime_ns > os.stat(store_path).st_mtime_ns
+    return synced != {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def import_excel(excel_file, store):
+    """Copy the assignment table from an Excel output file into store."""
+    df = pd.read_excel(excel_file)
+    ChangeJournal(store.path).discard()
+    store.save(df)
+    record_excel_sync(store.path, excel_file)
+    logger.info("Imported %s rows from %s into %s", len(df), excel_file, store.path)
+    return df
+
+def export_excel(store, families_dict, excel_file):
+    """Write the assignment table held in store to an Excel file with dropdowns."""
+    df = store.load()
+    write_shelf_workbook(df, families_dict, excel_file)
+    record_excel_sync(store.path, excel_file)
+    logger.info("Exported %s rows from %s to %s", len(df), store.path, excel_file)
+    return df
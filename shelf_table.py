@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+
+# Bounds of the undo history: number of edits and total rows held across them
+HISTORY_LIMIT = 1000
+HISTORY_MAX_ROWS = 2_000_000
+# Columns an edit can change
+EDIT_COLUMNS = ('Family', 'Category')
+
+def blank_mask(values):
+    """Boolean array, True where a value means an empty cell: None, NaN/NA, or a string of only whitespace.
+
+    This is the one definition of a blank cell; is_blank() applies it to a single value.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    mask = values.isna().to_numpy().copy()
+    if not pd.api.types.is_numeric_dtype(values) and not mask.all():
+        try:
+            mask |= values.str.strip().eq("").fillna(False).to_numpy(dtype=bool)
+        except AttributeError:
+            # No strings in the column at all
+            pass
+    return mask
+
+def is_blank(value):
+    """Scalar form of blank_mask()."""
+    if isinstance(value, str):
+        return not value.strip()
+    return value is None or bool(pd.isna(value))
+
+def to_compact(df, families_dict=None):
+    """Return the assignment table in its compact in-memory form.
+
+    Text columns (Section, Family, Category) become dictionary-encoded categoricals,
+    with blank strings turned into missing values, and integer coordinates are
+    downcast to the smallest dtype that holds them. When families_dict is given, every
+    catalog family and category is registered up front so edits rarely add categories.
+    """
+    compact = {}
+    for name in df.columns:
+        column = df[name]
+        if pd.api.types.is_integer_dtype(column):
+            compact[name] = pd.to_numeric(column, downcast='integer')
+            continue
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype('category')
+        if "" in column.cat.categories:
+            column = column.cat.remove_categories([""])
+        compact[name] = column
+
+    if families_dict:
+        catalog = {
+            'Family': list(families_dict.keys()),
+            'Category': list(dict.fromkeys(str(cat) for cats in families_dict.values() for cat in cats))
+        }
+        for name, values in catalog.items():
+            if name in compact:
+                missing = pd.Index(values).difference(compact[name].cat.categories)
+                if len(missing):
+                    compact[name] = compact[name].cat.add_categories(missing)
+    return pd.DataFrame(compact, index=df.index)
+
+def from_compact(df):
+    """Return df with plain object strings and int64 coordinates, as read from Excel."""
+    plain = {}
+    for name in df.columns:
+        column = df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            plain[name] = column.astype(object)
+        elif pd.api.types.is_integer_dtype(column):
+            plain[name] = column.astype(np.int64)
+        else:
+            plain[name] = column
+    return pd.DataFrame(plain, index=df.index)
+
+def set_cell(df, row, column, value):
+    """Store value in df (compact or not) at row label `row`, adding a category if needed."""
+    if is_blank(value):
+        df.at[row, column] = np.nan
+        return
+    if isinstance(df[column].dtype, pd.CategoricalDtype) and value not in df[column].cat.categories:
+        df[column] = df[column].cat.add_categories([value])
+    df.at[row, column] = value
+
+def select_rows(df, section=None, aisle=None, side=None, level=None, shelf=None):
+    """Row positions of the shelves matching every given coordinate.
+
+    Each selector is a single value or a list of values; selectors left as None
+    match everything, so select_rows(df, section="A") is the whole section.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for name, value in (('Section', section), ('Aisle', aisle), ('Side', side), ('Level', level), ('Shelf', shelf)):
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple, set, np.ndarray)) else [value]
+        if name == 'Section':
+            values = [str(v) for v in values]
+            mask &= df[name].astype(str).isin(values).to_numpy()
+        else:
+            mask &= df[name].isin([int(v) for v in values]).to_numpy()
+    return np.flatnonzero(mask)
+
+def bulk_assign(df, rows, family, category):
+    """Set Family and Category of row positions `rows` in one assignment per column.
+
+    Missing categories are added first, so the compact (categorical) columns keep their
+    dtype. Returns the row positions as an array.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    for column, value in (('Family', family), ('Category', category)):
+        if is_blank(value):
+            value = np.nan
+        elif isinstance(df[column].dtype, pd.CategoricalDtype) and value not in df[column].cat.categories:
+            df[column] = df[column].cat.add_categories([value])
+        df.iloc[rows, df.columns.get_loc(column)] = value
+    return rows
+
+def bay_summary(df, index):
+    """One row per bay (Section, Aisle, Side) in store order, for drawing the store overview.
+
+    Columns: Section, Aisle, Side, Levels, Shelves (grid size), Rows (shelves that
+    exist), Assigned (share of them with a Category) and Dominant (category code held
+    by most shelves, -1 if none).
+    """
+    codes = df['Category'].cat.codes.to_numpy()
+    records = []
+    for key in sorted(index.bays):
+        rows = index.bays[key]
+        bay_codes = codes[rows]
+        assigned = bay_codes[bay_codes >= 0]
+        dominant = int(np.bincount(assigned).argmax()) if len(assigned) else -1
+        records.append(key + (int(index.levels[rows].max()), int(index.shelves[rows].max()), len(rows),
+                              len(assigned) / len(rows), dominant))
+    return pd.DataFrame(records, columns=['Section', 'Aisle', 'Side', 'Levels', 'Shelves', 'Rows', 'Assigned', 'Dominant'])
+
+def _set_codes(df, rows, column, codes):
+    """Write category codes (-1 for blank) of a categorical column at row positions."""
+    all_codes = df[column].cat.codes.to_numpy().copy()
+    all_codes[rows] = codes
+    df[column] = pd.Categorical.from_codes(all_codes, dtype=df[column].dtype)
+
+class EditHistory:
+    """Undo/redo stacks of Family/Category edits on a compact table.
+
+    An edit is stored as its row positions plus the old and new category codes of
+    each edited column, not as a copy of the table. Categories are only ever added
+    to the compact columns, never removed, so stored codes stay valid. The oldest
+    edits are dropped beyond HISTORY_LIMIT edits or HISTORY_MAX_ROWS rows.
+    """
+
+    def __init__(self, limit=HISTORY_LIMIT, max_rows=HISTORY_MAX_ROWS):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        self.max_rows = max_rows
+
+    def capture(self, df, rows):
+        """Current codes of rows; pass the result to record() once the edit is made."""
+        rows = np.asarray(rows, dtype=np.intp)
+        return rows, [df[column].cat.codes.to_numpy()[rows] for column in EDIT_COLUMNS]
+
+    def record(self, df, before):
+        """Push the edit made to the rows captured in `before`; clears the redo stack."""
+        rows, old_codes = before
+        if not len(rows):
+            return
+        new_codes = [df[column].cat.codes.to_numpy()[rows] for column in EDIT_COLUMNS]
+        self.undo_stack.append((rows.astype(np.int32), old_codes, new_codes))
+        self.redo_stack.clear()
+        while sum(len(edit[0]) for edit in self.undo_stack) > self.max_rows and len(self.undo_stack) > 1:
+            self.undo_stack.popleft()
+
+    def undo(self, df):
+        """Revert the last edit; returns its row positions, or None if there is nothing to undo."""
+        if not self.undo_stack:
+            return None
+        rows, old_codes, new_codes = self.undo_stack.pop()
+        for column, codes in zip(EDIT_COLUMNS, old_codes):
+            _set_codes(df, rows, column, codes)
+        self.redo_stack.append((rows, old_codes, new_codes))
+        return rows
+
+    def redo(self, df):
+        """Re-apply the last undone edit; returns its row positions, or None."""
+        if not self.redo_stack:
+            return None
+        rows, old_codes, new_codes = self.redo_stack.pop()
+        for column, codes in zip(EDIT_COLUMNS, new_codes):
+            _set_codes(df, rows, column, codes)
+        self.undo_stack.append((rows, old_codes, new_codes))
+        return rows
+
+class ShelfIndex:
+    """Index from shelf coordinates to row positions in the assignment table.
+
+    Rows are grouped per bay (Section, Aisle, Side) once; the (Level, Shelf) lookup
+    of a bay is built the first time that bay is asked for. Edits only change
+    Family/Category, so the index stays valid until the table is reloaded, at which
+    point rebuild() must be called.
+    """
+
+    def __init__(self, df):
+        self.rebuild(df)
+
+    def rebuild(self, df):
+        """Recompute the per-bay grouping for df."""
+        self.levels = df['Level'].to_numpy()
+        self.shelves = df['Shelf'].to_numpy()
+        groups = df.groupby(['Section', 'Aisle', 'Side'], observed=True, sort=False).indices
+        # Normalise keys to plain str/int so lookups from Tk string variables match
+        self.bays = {(str(section), int(aisle), int(side)): rows for (section, aisle, side), rows in groups.items()}
+        self._cells = {}
+
+    def bay_rows(self, section, aisle, side):
+        """Row positions of one bay (empty if the bay does not exist)."""
+        return self.bays.get((str(section), int(aisle), int(side)), np.empty(0, dtype=np.intp))
+
+    def bay_cells(self, section, aisle, side):
+        """{(level, shelf): row position} for one bay."""
+        key = (str(section), int(aisle), int(side))
+        if key not in self._cells:
+            rows = self.bay_rows(*key)
+            self._cells[key] = dict(zip(zip(self.levels[rows].tolist(), self.shelves[rows].tolist()), rows.tolist()))
+        return self._cells[key]
+
+    def position(self, section, aisle, side, level, shelf):
+        """Row position of one shelf, or None."""
+        return self.bay_cells(section, aisle, side).get((int(level), int(shelf)))
+
+    def positions(self, section, aisle, side, cells):
+        """Row positions of the (level, shelf) cells of one bay; cells without a shelf are skipped."""
+        bay_cells = self.bay_cells(section, aisle, side)
+        found = [bay_cells.get((int(level), int(shelf))) for level, shelf in cells]
+        return np.array([row for row in found if row is not None], dtype=np.intp)